@@ -0,0 +1,101 @@
+"""Websocket payload per rerun: base64 <audio> HTML (the old players) versus st.audio media URLs.
+
+Renders a dictionary-sized result (short word clips and longer example clips) through Streamlit's
+AppTest, then replays each run's ForwardMsgs through the same reference cache the server uses
+(messages of 10 kB or more that the session already holds are sent as a hash reference).
+
+    python -m benchmarks.audio_payload [--reruns 5] [--words 12] [--examples 8]
+"""
+import sys
+import argparse
+import warnings
+from streamlit.runtime.forward_msg_cache import ForwardMsgCache, create_reference_msg, populate_hash_if_needed
+from streamlit.runtime.runtime_util import is_cacheable_msg, serialize_forward_msg
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+# gTTS output is 32 kbps: about 4 kB per second of speech
+WORD_CLIP_BYTES = 5000
+EXAMPLE_CLIP_BYTES = 14000
+
+def dictionary_page(mode, words, examples):
+    import base64
+    import streamlit as st
+
+    frame = bytes([0xFF, 0xF3, 0x44, 0xC4]) + bytes(92)
+    clips = [frame * (5000 // 96) + bytes([i]) for i in range(words)]
+    clips += [frame * (14000 // 96) + bytes([100 + i]) for i in range(examples)]
+    for i, clip in enumerate(clips):
+        st.write(f"Item {i}")
+        if mode == "base64":
+            # The player every page used before: the MP3 inlined into the HTML as a data URI
+            b64 = base64.b64encode(clip).decode()
+            st.markdown(f'<audio controls key="{i}"><source src="data:audio/mp3;base64,{b64}" type="audio/mp3"></audio>',
+                        unsafe_allow_html=True)
+        else:
+            st.audio(clip, format="audio/mp3")
+
+def capture_runs(mode, reruns, words, examples):
+    """ForwardMsgs of the first run and each rerun, as they would be flushed to the browser"""
+    runs = []
+    original_run = LocalScriptRunner.run
+
+    def run_and_capture(self, *args, **kwargs):
+        tree = original_run(self, *args, **kwargs)
+        runs.append([msg for msg in self.forward_msgs()])
+        return tree
+
+    LocalScriptRunner.run = run_and_capture
+    try:
+        app = AppTest.from_function(dictionary_page, args=(mode, words, examples))
+        for _ in range(reruns + 1):
+            app.run()
+    finally:
+        LocalScriptRunner.run = original_run
+    return runs
+
+class BenchmarkSession:
+    """Stands in for the AppSession the cache tracks (it only needs to be weak-referenceable)"""
+
+def wire_bytes(runs):
+    """Bytes sent per run, replacing messages the session already holds with references"""
+    cache = ForwardMsgCache()
+    session = BenchmarkSession()
+    sizes = []
+    for run_count, msgs in enumerate(runs):
+        total = 0
+        for msg in msgs:
+            msg.metadata.cacheable = is_cacheable_msg(msg)
+            to_send = msg
+            if msg.metadata.cacheable:
+                populate_hash_if_needed(msg)
+                if cache.has_message_reference(msg, session, run_count):
+                    to_send = create_reference_msg(msg)
+                cache.add_message(msg, session, run_count)
+            total += len(serialize_forward_msg(to_send))
+        sizes.append(total)
+        cache.remove_expired_entries_for_session(session, run_count + 1)
+    return sizes
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reruns", type=int, default=5)
+    parser.add_argument("--words", type=int, default=12, help="Short clips (words, synonyms)")
+    parser.add_argument("--examples", type=int, default=8, help="Longer clips (example sentences)")
+    args = parser.parse_args(argv)
+    warnings.filterwarnings("ignore")
+
+    media_bytes = args.words * WORD_CLIP_BYTES + args.examples * EXAMPLE_CLIP_BYTES
+    print(f"{args.words} word clips of ~{WORD_CLIP_BYTES // 1000} kB, "
+          f"{args.examples} example clips of ~{EXAMPLE_CLIP_BYTES // 1000} kB ({media_bytes / 1000:.0f} kB of MP3)")
+    print(f"{'player':<10}{'first run kB':>14}{'per rerun kB':>14}")
+    for mode in ("base64", "st.audio"):
+        sizes = wire_bytes(capture_runs(mode, args.reruns, args.words, args.examples))
+        rerun = sum(sizes[1:]) / max(len(sizes) - 1, 1)
+        print(f"{mode:<10}{sizes[0] / 1000:>14.1f}{rerun / 1000:>14.1f}")
+    print(f"st.audio clips are fetched from /media once per URL ({media_bytes / 1000:.0f} kB), "
+          f"not resent over the websocket")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
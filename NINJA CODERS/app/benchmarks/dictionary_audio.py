@@ -0,0 +1,73 @@
+"""Dictionary audio: serial synthesis versus the bounded thread pool, against a local fake TTS server.
+
+Every clip takes a random 100-500 ms on the fake server. The serial loop should take about the
+sum of those latencies; synthesize_many about the slowest clip per round of workers.
+
+    python -m benchmarks.dictionary_audio [--clips 20] [--workers 8]
+"""
+import sys
+import time
+import random
+import argparse
+import tempfile
+import requests
+from services import tts
+from services.tts_engines import EngineRouter, TTSEngine
+from benchmarks.fake_server import FAKE_MP3_FRAME, FakeServer
+
+class FakeHTTPEngine(TTSEngine):
+    """A TTS engine that fetches clips from the fake server, one HTTP round trip per clip"""
+
+    # Takes gTTS's place in the engine routes
+    name = "gtts"
+
+    def __init__(self, url: str):
+        self.url = url
+        self.languages = {"en": "en"}
+
+    def synthesize(self, text, lang, slow=False, timeout=None):
+        response = requests.post(f"{self.url}/tts", json={"text": text, "lang": lang}, timeout=timeout)
+        response.raise_for_status()
+        return response.content
+
+def use_fresh_backend(url: str) -> None:
+    # Point the shared synthesize() at the fake engine and an empty cache, so every clip is a miss
+    cache = tts.AudioCache(tempfile.mkdtemp(prefix="audio_cache_"))
+    router = EngineRouter([FakeHTTPEngine(url)])
+    tts.get_audio_cache = lambda: cache
+    tts.get_tts_router = lambda: router
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clips", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    latencies = {f"example sentence {i}": rng.uniform(0.1, 0.5) for i in range(args.clips)}
+    texts = list(latencies)
+
+    def handler(path, body):
+        return 200, FAKE_MP3_FRAME * 10, latencies[body["text"]]
+
+    with FakeServer(handler) as server:
+        use_fresh_backend(server.url)
+        start = time.perf_counter()
+        for text in texts:
+            tts.synthesize(text, "en", timeout=10)
+        serial = time.perf_counter() - start
+
+        use_fresh_backend(server.url)
+        start = time.perf_counter()
+        clips, failed = tts.synthesize_many(texts, "en", workers=args.workers, timeout=10)
+        parallel = time.perf_counter() - start
+
+    print(f"{args.clips} clips, sum of latencies {sum(latencies.values()):.2f}s, "
+          f"slowest {max(latencies.values()):.2f}s")
+    print(f"serial loop:        {serial:.2f}s")
+    print(f"synthesize_many x{args.workers}: {parallel:.2f}s ({len(clips)} clips, {len(failed)} failed)")
+    return 0 if not failed else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""Local stand-in HTTP server for benchmarks and tests.
+
+The handler receives (path, parsed JSON body) and returns (status, payload, delay seconds);
+a bytes payload is sent as-is, anything else as JSON.
+"""
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Tuple
+
+Handler = Callable[[str, Any], Tuple[int, Any, float]]
+
+class FakeServer:
+    def __init__(self, handler: Handler):
+        self.handler = handler
+        self.requests = 0
+        self.connections = 0
+        self.lock = threading.Lock()
+        server = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; without this, delayed ACKs add 40 ms per request
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with server.lock:
+                    server.connections += 1
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                raw = self.rfile.read(length) if length else b""
+                body = json.loads(raw) if raw else None
+                with server.lock:
+                    server.requests += 1
+                status, payload, delay = server.handler(self.path, body)
+                if delay:
+                    time.sleep(delay)
+                data = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "audio/mpeg" if isinstance(payload, bytes) else "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), RequestHandler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def __enter__(self) -> "FakeServer":
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+# One silent MPEG-2 Layer III frame (24 kHz, 32 kbps, mono), like a tiny gTTS clip
+FAKE_MP3_FRAME = bytes([0xFF, 0xF3, 0x44, 0xC4]) + bytes(92)
@@ -0,0 +1,86 @@
+"""Quiz questions: serial generation versus the concurrent worker pool, against a stubbed Gemini model.
+
+Every request sleeps a random injected latency (default 0.8-2.5 s, under the router's 4 s hedge
+delay so no request is hedged) and answers with a valid, unique question. Serial generation
+should take about the sum of the latencies; the pool about the slowest request per round of workers.
+
+    python -m benchmarks.quiz_generation [--questions 10] [--workers 5]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from types import SimpleNamespace
+from services import quiz_generator
+
+DIFFICULTIES = ["beginner", "intermediate", "advanced"]
+
+class FakeModel:
+    """Stands in for a GenerativeModel: sleeps the injected latency, then returns a fresh question"""
+
+    def __init__(self, latencies):
+        self.latencies = latencies
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    def generate_content(self, prompt):
+        with self.lock:
+            self.calls += 1
+            number = self.calls
+            delay = self.latencies[(number - 1) % len(self.latencies)]
+        time.sleep(delay)
+        question = {
+            "question": f"Which word completes sentence number {number}?",
+            "options": [f"option {number}-{i}" for i in range(4)],
+            "correct_answer": f"option {number}-0",
+            "explanation": f"Explanation {number}",
+            "difficulty": "beginner",
+            "topic": "Vocabulary"
+        }
+        return SimpleNamespace(text=json.dumps(question))
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=5)
+    parser.add_argument("--min-latency", type=float, default=0.8)
+    parser.add_argument("--max-latency", type=float, default=2.5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    latencies = [rng.uniform(args.min_latency, args.max_latency) for _ in range(args.questions)]
+    model = FakeModel(latencies)
+    quiz_generator.get_generative_model = lambda api_key, model_name: model
+    os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+    quiz = quiz_generator.GeminiQuiz()
+    difficulties = [DIFFICULTIES[i % len(DIFFICULTIES)] for i in range(args.questions)]
+
+    start = time.perf_counter()
+    history = set()
+    serial_questions = [
+        quiz.generate_question("English", "French", "Vocabulary", difficulty, history)
+        for difficulty in difficulties
+    ]
+    serial = time.perf_counter() - start
+
+    model.calls = 0
+    start = time.perf_counter()
+    pooled_questions = []
+    quiz.generate_concurrently(
+        "English", "French", "Vocabulary", difficulties, set(), pooled_questions.append, max_workers=args.workers
+    )
+    pooled = time.perf_counter() - start
+
+    print(f"{args.questions} questions, injected latency {args.min_latency}-{args.max_latency} s")
+    print(f"  sum of latencies     {sum(latencies):6.2f} s   slowest {max(latencies):.2f} s")
+    print(f"  serial               {serial:6.2f} s   ({len(serial_questions)} questions)")
+    print(f"  pool, {args.workers} workers     {pooled:6.2f} s   ({len(pooled_questions)} questions)")
+    print(f"  speedup              {serial / pooled:6.1f}x")
+    return 0 if len(serial_questions) == len(pooled_questions) == args.questions else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
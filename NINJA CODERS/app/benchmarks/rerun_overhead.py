@@ -0,0 +1,59 @@
+"""Per-rerun overhead of the chat and quiz pages with and without the shared client cache.
+
+Runs the real page scripts through Streamlit's AppTest. The "uncached" mode clears
+st.cache_resource before every rerun, which rebuilds the Gemini/LangChain clients each time,
+as the pages did before the clients were shared. No request is sent to Gemini.
+
+    python -m benchmarks.rerun_overhead [--reruns 20]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import warnings
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = ["pages/features/languito_chat.py", "pages/features/quiz.py"]
+
+def measure(page: str, reruns: int, cached: bool) -> list:
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    st.cache_resource.clear()
+    app = AppTest.from_file(os.path.join(APP_DIR, page), default_timeout=120)
+    app.run()
+    timings = []
+    for _ in range(reruns):
+        if not cached:
+            st.cache_resource.clear()
+        start = time.perf_counter()
+        app.run()
+        timings.append((time.perf_counter() - start) * 1000)
+    if app.exception:
+        raise RuntimeError(f"{page} failed: {app.exception}")
+    return timings
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reruns", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings("ignore")
+    sys.path.insert(0, APP_DIR)
+    os.environ.setdefault("GOOGLE_API_KEY", "benchmark-key-not-used-for-requests")
+    # The pages create their SQLite files in the working directory
+    os.chdir(tempfile.mkdtemp(prefix="rerun_overhead_"))
+
+    print(f"{'page':<36}{'mode':<10}{'median ms':>10}{'p90 ms':>10}")
+    for page in PAGES:
+        for cached in (False, True):
+            timings = sorted(measure(page, args.reruns, cached))
+            p90 = timings[int(len(timings) * 0.9) - 1]
+            mode = "cached" if cached else "uncached"
+            print(f"{page:<36}{mode:<10}{statistics.median(timings):>10.1f}{p90:>10.1f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""Translator HTTP: a fresh requests.post per call versus the pooled keep-alive client.
+
+A local stand-in mimics the Hugging Face inference API: every request takes --latency seconds,
+a model can answer 503 {"estimated_time": ...} while "loading", and a request can hang. Over
+plain HTTP on localhost a new connection is cheap, so the keep-alive gain measured here is a
+lower bound; against the real API every fresh connection also pays a TLS handshake.
+
+    python -m benchmarks.translator_http [--requests 50] [--latency 0.02]
+"""
+import sys
+import time
+import argparse
+import statistics
+import requests
+from services.http_client import PooledHTTPClient
+from benchmarks.fake_server import FakeServer
+
+def translation(path, body):
+    return [{"translation_text": f"<{text}>"} for text in body["inputs"]]
+
+def timed_calls(post, url, count):
+    latencies = []
+    for i in range(count):
+        start = time.perf_counter()
+        response = post(f"{url}/models/opus-mt-en-fr", json={"inputs": [f"sentence {i}"]})
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+def report(label, latencies, connections):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"  {label:<22} mean {statistics.mean(latencies) * 1000:6.1f} ms   p95 {p95 * 1000:6.1f} ms   "
+          f"{connections} connection(s)")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.02)
+    args = parser.parse_args(argv)
+
+    print(f"{args.requests} sequential requests, {args.latency * 1000:.0f} ms server latency")
+    with FakeServer(lambda path, body: (200, translation(path, body), args.latency)) as server:
+        fresh = timed_calls(lambda url, json: requests.post(url, json=json, timeout=10), server.url, args.requests)
+        report("fresh requests.post", fresh, server.connections)
+    with FakeServer(lambda path, body: (200, translation(path, body), args.latency)) as server:
+        pooled = timed_calls(PooledHTTPClient().post, server.url, args.requests)
+        report("PooledHTTPClient", pooled, server.connections)
+
+    # The model "loads" for the first two requests and hints how long to wait
+    loading = {"left": 2}
+
+    def loading_model(path, body):
+        if loading["left"]:
+            loading["left"] -= 1
+            return 503, {"error": "Model is currently loading", "estimated_time": 1.0}, 0
+        return 200, translation(path, body), args.latency
+
+    with FakeServer(loading_model) as server:
+        start = time.perf_counter()
+        response = PooledHTTPClient().post(f"{server.url}/models/opus-mt-en-fr", json={"inputs": ["hello"]})
+        elapsed = time.perf_counter() - start
+        print(f"  {'503 loading x2':<22} status {response.status_code} after {elapsed:.2f} s "
+              f"({server.requests} requests)")
+        loaded = response.status_code == 200
+
+    # A hung upstream is cut off by the read timeout instead of freezing the script thread
+    with FakeServer(lambda path, body: (200, translation(path, body), 3.0)) as server:
+        client = PooledHTTPClient(read_timeout=0.5)
+        start = time.perf_counter()
+        try:
+            client.post(f"{server.url}/models/opus-mt-en-fr", json={"inputs": ["hello"]})
+            timed_out = False
+        except requests.Timeout:
+            timed_out = True
+        print(f"  {'hung upstream':<22} {'timed out' if timed_out else 'answered'} after "
+              f"{time.perf_counter() - start:.2f} s")
+
+    return 0 if loaded and timed_out else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
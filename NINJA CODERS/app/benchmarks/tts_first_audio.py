@@ -0,0 +1,63 @@
+"""Time to first audio: one clip for the whole text versus speak_progressively, against a local fake TTS server.
+
+The fake server takes --per-100-chars seconds for every 100 characters, like gTTS, which sends its
+~100-character requests one after another. Synthesizing the whole paragraph plays nothing until
+every request is done; speak_progressively plays the first sentence chunk as soon as it is ready.
+
+    python -m benchmarks.tts_first_audio [--sentences 10] [--per-100-chars 0.3]
+"""
+import sys
+import math
+import time
+import argparse
+from services import tts
+from benchmarks.dictionary_audio import use_fresh_backend
+from benchmarks.fake_server import FAKE_MP3_FRAME, FakeServer
+
+SENTENCES = [
+    "The morning train to the coast was already full of travellers.",
+    "We found two seats near the window and watched the fields go by.",
+    "My sister had packed sandwiches, fruit and a flask of hot tea.",
+    "Halfway there, the train stopped for almost twenty minutes.",
+    "Nobody told us why, but the conductor smiled and shrugged.",
+    "When we finally arrived, the sky had turned a brilliant blue.",
+    "The beach was quieter than we expected for a summer weekend.",
+    "We walked along the sand until the lighthouse came into view.",
+    "In the evening we ate grilled fish at a small harbour café.",
+    "On the way home, everyone fell asleep before the first station."
+]
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sentences", type=int, default=10)
+    parser.add_argument("--per-100-chars", type=float, default=0.3)
+    args = parser.parse_args(argv)
+
+    text = " ".join(SENTENCES[i % len(SENTENCES)] for i in range(args.sentences))
+
+    def handler(path, body):
+        # Sequential ~100-character requests, as gTTS makes them
+        requests_needed = math.ceil(len(body["text"]) / 100)
+        # About six seconds of audio per 100 characters
+        return 200, FAKE_MP3_FRAME * 250 * requests_needed, args.per_100_chars * requests_needed
+
+    with FakeServer(handler) as server:
+        use_fresh_backend(server.url)
+        start = time.perf_counter()
+        tts.synthesize(text, "en", timeout=30)
+        whole = time.perf_counter() - start
+
+        use_fresh_backend(server.url)
+        plays = []
+        full_clip, chunks, first_audio, total = tts.speak_progressively(
+            text, "en", lambda clip, start_time: plays.append(start_time), timeout=30
+        )
+
+    print(f"{len(text)} characters, {args.per_100_chars:.2f}s per 100 characters")
+    print(f"  whole text          first audio {whole:5.2f}s")
+    print(f"  speak_progressively first audio {first_audio:5.2f}s   full clip {total:5.2f}s   "
+          f"({chunks} chunks, full clip swapped in at {plays[-1]}s)")
+    return 0 if first_audio < whole and len(plays) == (2 if chunks > 1 else 1) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
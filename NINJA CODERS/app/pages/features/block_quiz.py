@@ -1,32 +1,35 @@
 import streamlit as st
+import os
 import random
-from gtts import gTTS
-from io import BytesIO
+import logging
+from services.tts import text_to_speech
+from services.audio_pack import TEMPLATES, WORDS, AudioPack, compose_sentence
+
+logger = logging.getLogger(__name__)
+
+# Precomputed sentence audio (built with: python -m services.audio_pack)
+AUDIO_PACK_PATH = "block_quiz_audio.pack"
+
+@st.cache_resource(show_spinner=False)
+def get_audio_pack():
+    """Memory-mapped audio pack shared by all sessions, or None when it has not been built"""
+    if not os.path.exists(AUDIO_PACK_PATH):
+        return None
+    try:
+        return AudioPack(AUDIO_PACK_PATH)
+    except Exception as e:
+        logger.error(f"Could not open {AUDIO_PACK_PATH}: {str(e)}")
+        return None
 
 # Simple sentence generator
 def generate_sentence():
-    templates = [
-        "The {adjective} {noun} {verb} {adverb}.",
-        "{subject} {verb} {object} {adverb}.",
-        "In the {place}, {subject} {verb} {object}.",
-        "{timeframe}, {subject} will {verb} {object}.",
-        "{subject} {verb} {object} because {reason}."
-    ]
-    
-    words = {
-        "adjective": ["happy", "sad", "excited", "curious", "friendly", "brave"],
-        "noun": ["cat", "dog", "bird", "child", "teacher", "student"],
-        "verb": ["runs", "jumps", "sings", "reads", "writes", "plays"],
-        "adverb": ["quickly", "slowly", "loudly", "quietly", "carefully", "happily"],
-        "subject": ["The boy", "The girl", "The teacher", "The dog", "My friend", "The student"],
-        "object": ["the ball", "a book", "the guitar", "homework", "a game", "the puzzle"],
-        "place": ["park", "school", "library", "garden", "playground", "museum"],
-        "timeframe": ["Tomorrow", "Next week", "In the future", "Soon", "Later today"],
-        "reason": ["it's fun", "it's important", "they enjoy it", "it's a hobby", "it's challenging"]
-    }
-    
-    template = random.choice(templates)
-    sentence = template.format(**{k: random.choice(v) for k, v in words.items()})
+    # With a pack, stick to packed sentences so the audio never needs the network
+    audio_pack = get_audio_pack()
+    if audio_pack:
+        return random.choice(audio_pack.sentences)
+
+    template = random.choice(TEMPLATES)
+    sentence = template.format(**{k: random.choice(v) for k, v in WORDS.items()})
     return sentence
 
 # Function to scramble a sentence into words and add tricky words
@@ -44,11 +47,25 @@ def scramble_sentence(sentence):
 
 # Function to generate audio for the sentence
 def text_to_speech_quiz(sentence):
-    tts = gTTS(text=sentence, lang="en", slow=False)
-    buf = BytesIO()
-    tts.write_to_fp(buf)
-    buf.seek(0)
-    return buf
+    return text_to_speech(sentence, "en")
+
+# Audio for the current sentence, memoized in the session so word clicks never re-synthesize it.
+# Lookup order: session memo, precomputed pack, word-by-word composition, full synthesis.
+def get_sentence_audio(sentence, word_by_word=False):
+    memo_key = (sentence, word_by_word)
+    cached = st.session_state.get("sentence_audio")
+    if cached is None or cached[0] != memo_key:
+        audio_pack = get_audio_pack()
+        clip = audio_pack.get(sentence) if audio_pack else None
+        if clip is None and word_by_word:
+            try:
+                clip = compose_sentence(sentence, "en")
+            except Exception as e:
+                logger.warning(f"Could not compose audio for '{sentence}': {str(e)}")
+        if clip is None:
+            clip = text_to_speech_quiz(sentence).getvalue()
+        st.session_state.sentence_audio = (memo_key, clip)
+    return st.session_state.sentence_audio[1]
 
 # Streamlit setup
 st.title("🎤️ Languito Block Quiz!")
@@ -62,8 +79,13 @@ if "original_sentence" not in st.session_state:
 if "correct_words" not in st.session_state or "scrambled_words" not in st.session_state:
     st.session_state.correct_words, st.session_state.scrambled_words = scramble_sentence(st.session_state.original_sentence)
 
+# Word-by-word audio only needs the ~60 vocabulary clips, so it keeps working offline once they are cached
+with st.sidebar:
+    word_by_word = st.toggle("Word-by-word audio (offline)", value=False,
+                             help="Assemble the sentence from cached per-word clips instead of synthesizing it whole")
+
 # Play the audio
-audio_bytes = text_to_speech_quiz(st.session_state.original_sentence)
+audio_bytes = get_sentence_audio(st.session_state.original_sentence, word_by_word)
 st.audio(audio_bytes, format="audio/mp3")
 
 # Display scrambled words as buttons
@@ -2,13 +2,15 @@ from dotenv import load_dotenv
 import streamlit as st
 import os
 import logging
-import json
-from datetime import datetime
+import time
+import uuid
+from typing import Dict, Iterator, Optional
 from langchain import PromptTemplate
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.memory import ConversationBufferMemory
-from langchain.chains import ConversationChain
 import warnings
+from services.chat_memory import TokenBudgetMemory
+from services.chat_store import ChatStore
+from services.llm import MODEL_LADDER, get_chat_model, get_model_router
+from services.resilience import CircuitOpenError, call_with_retry, get_breaker
 
 warnings.filterwarnings("ignore")
 
@@ -31,23 +33,11 @@ class GeminiChat:
         self.setup_chat()
         
     def setup_chat(self) -> None:
-        """Initialize the ChatGoogleGenerativeAI with memory"""
+        """Initialize the ChatGoogleGenerativeAI client and prompts"""
         try:
-            self.llm = ChatGoogleGenerativeAI(
-                model="gemini-pro",
-                google_api_key=self.api_key,
-                temperature=0.7
-            )
-
-            # Initialize conversation memory
-            self.memory = ConversationBufferMemory()
-            
-            # Create conversation chain with memory
-            self.conversation = ConversationChain(
-                llm=self.llm,
-                memory=self.memory,
-                verbose=False
-            )
+            self.llm = get_chat_model(self.api_key, MODEL_LADDER[0], 0.7)
+            # Hedges slow replies and fails over along the model ladder
+            self.router = get_model_router("chat")
 
             self.template = """
             You are a multilingual language teacher specializing in teaching and translating various languages.
@@ -69,34 +59,92 @@ class GeminiChat:
                 template=self.template,
                 input_variables=["history", "question"]
             )
+
+            self.summary_template = PromptTemplate(
+                template="""
+            Condense the following conversation between a student and Languito, a language teacher,
+            into a short summary. Keep names, languages, words being studied and open questions.
+
+            Current summary:
+            {summary}
+
+            New messages:
+            {messages}
+
+            Updated summary:
+            """,
+                input_variables=["summary", "messages"]
+            )
         except Exception as e:
             logger.error(f"Error setting up Chat: {str(e)}")
             raise
 
-    def get_response(self, question: str, chat_history: list) -> str:
-        """Get response from ChatGoogleGenerativeAI with conversation history"""
+    def summarize(self, summary: str, messages: str) -> str:
+        """Fold new messages into a running conversation summary"""
+        prompt = self.summary_template.format(summary=summary or "(none)", messages=messages)
+        return call_with_retry(lambda: self.llm.invoke(prompt).content, breaker=get_breaker("gemini"), max_attempts=2)
+
+    def build_prompt(self, question: str, chat_history: list, memory: TokenBudgetMemory) -> str:
+        """Build the prompt from the budgeted history and the current question"""
+        history_text = memory.format_history(chat_history)
+        return self.prompt_template.format(history=history_text, question=question)
+
+    def stream_response(self, question: str, chat_history: list, memory: TokenBudgetMemory,
+                        latency: Optional[Dict[str, float]] = None) -> Iterator[str]:
+        """Stream response chunks from ChatGoogleGenerativeAI as they arrive, filling in latency when done"""
         try:
-            # Format chat history
-            history_text = "\n".join([f"{role}: {msg}" for role, msg in chat_history])
-            
-            # Get response using the conversation chain
-            response = self.conversation.predict(
-                input=self.prompt_template.format(
-                    history=history_text,
-                    question=question
-                )
+            start_time = time.perf_counter()
+            prompt = self.build_prompt(question, chat_history, memory)
+
+            def open_stream(model_name):
+                # Retrying and hedging are only safe until the first chunk has been shown
+                stream = get_chat_model(self.api_key, model_name, 0.7).stream(prompt)
+                for chunk in stream:
+                    if chunk.content:
+                        return chunk.content, stream
+                return "", stream
+
+            first_chunk, stream = call_with_retry(
+                lambda: self.router.call(open_stream), breaker=get_breaker("gemini")
+            )
+            first_token_time = time.perf_counter()
+            yield first_chunk
+            for chunk in stream:
+                if chunk.content:
+                    yield chunk.content
+            end_time = time.perf_counter()
+
+            if latency is None:
+                latency = {}
+            latency["first_token"] = first_token_time - start_time
+            latency["total"] = end_time - start_time
+            logger.info(
+                f"Streamed response: first token {latency['first_token']:.2f}s, "
+                f"total {latency['total']:.2f}s, "
+                f"prompt ~{memory.count_tokens(prompt)} tokens"
             )
-            return response
         except Exception as e:
-            logger.error(f"Error getting response: {str(e)}")
+            logger.error(f"Error streaming response: {str(e)}")
             raise
 
+@st.cache_resource(show_spinner=False)
+def get_gemini_chat() -> GeminiChat:
+    """Shared GeminiChat; per-session conversation state lives in st.session_state"""
+    return GeminiChat()
+
+@st.cache_resource(show_spinner=False)
+def get_chat_store() -> ChatStore:
+    return ChatStore()
+
 class StreamlitApp:
     def __init__(self):
+        start_time = time.perf_counter()
         self.setup_page()
         self.initialize_session_state()
+        self.store = get_chat_store()
         self.load_chat_history()
-        self.gemini = GeminiChat()
+        self.gemini = get_gemini_chat()
+        logger.info(f"Chat page setup took {(time.perf_counter() - start_time) * 1000:.1f} ms")
 
     def setup_page(self) -> None:
         """Configure Streamlit page settings"""
@@ -114,54 +162,81 @@ class StreamlitApp:
             st.session_state['current_chat_id'] = None
         if 'chat_history' not in st.session_state:
             st.session_state['chat_history'] = []
+        if 'chat_memories' not in st.session_state:
+            st.session_state['chat_memories'] = {}
 
-    def save_chat_history(self) -> None:
-        """Save chat history to a JSON file"""
-        try:
-            data = {
-                'chats': st.session_state['chats'],
-                'current_chat_id': st.session_state['current_chat_id']
-            }
-            with open('chat_history.json', 'w') as f:
-                json.dump(data, f)
-        except Exception as e:
-            logger.error(f"Error saving chat history: {str(e)}")
+    def get_chat_memory(self) -> TokenBudgetMemory:
+        """Get the conversation memory of the current chat"""
+        chat_id = st.session_state['current_chat_id']
+        if chat_id not in st.session_state['chat_memories']:
+            st.session_state['chat_memories'][chat_id] = TokenBudgetMemory()
+        return st.session_state['chat_memories'][chat_id]
 
     def load_chat_history(self) -> None:
-        """Load chat history from JSON file"""
+        """Load the chat index once per session; messages are loaded per chat"""
+        if st.session_state.get('chats_loaded'):
+            return
         try:
-            if os.path.exists('chat_history.json'):
-                with open('chat_history.json', 'r') as f:
-                    data = json.load(f)
-                    st.session_state['chats'] = data.get('chats', {})
-                    st.session_state['current_chat_id'] = data.get('current_chat_id')
-                    if st.session_state['current_chat_id']:
-                        st.session_state['chat_history'] = st.session_state['chats'][st.session_state['current_chat_id']]['messages']
+            self.store.import_json('chat_history.json')
+            st.session_state['chats'] = self.store.list_chats()
+            current_chat_id = self.store.get_setting('current_chat_id')
+            if current_chat_id in st.session_state['chats']:
+                st.session_state['current_chat_id'] = current_chat_id
+                st.session_state['chat_history'] = self.store.load_messages(current_chat_id)
+            st.session_state['chats_loaded'] = True
         except Exception as e:
             logger.error(f"Error loading chat history: {str(e)}")
 
     def create_new_chat(self) -> None:
         """Create a new chat session"""
-        if st.session_state['current_chat_id']:
-            current_chat = st.session_state['chats'][st.session_state['current_chat_id']]
-            if not current_chat['messages']:
-                st.warning("The current chat is empty. Use it before creating a new one.")
-                return
-
-        chat_id = datetime.now().strftime("%Y%m%d_%H%M%S")
-        st.session_state['chats'][chat_id] = {
-            'name': f"Chat {len(st.session_state['chats']) + 1}",
-            'messages': []
-        }
+        if st.session_state['current_chat_id'] and not st.session_state['chat_history']:
+            st.warning("The current chat is empty. Use it before creating a new one.")
+            return
+
+        # Random ids: two sessions creating a chat in the same second must not share it
+        chat_id = uuid.uuid4().hex
+        name = f"Chat {len(st.session_state['chats']) + 1}"
+        st.session_state['chats'][chat_id] = name
         st.session_state['current_chat_id'] = chat_id
         st.session_state['chat_history'] = []
-        self.save_chat_history()
+        try:
+            self.store.create_chat(chat_id, name)
+            self.store.set_setting('current_chat_id', chat_id)
+        except Exception as e:
+            logger.error(f"Error saving chat: {str(e)}")
 
     def switch_chat(self, chat_id: str) -> None:
         """Switch to a different chat session"""
         st.session_state['current_chat_id'] = chat_id
-        st.session_state['chat_history'] = st.session_state['chats'][chat_id]['messages']
-        self.save_chat_history()
+        try:
+            st.session_state['chat_history'] = self.store.load_messages(chat_id)
+            self.store.set_setting('current_chat_id', chat_id)
+        except Exception as e:
+            logger.error(f"Error loading chat {chat_id}: {str(e)}")
+            st.session_state['chat_history'] = []
+
+    def delete_chat(self, chat_id: str) -> None:
+        """Delete a chat session"""
+        del st.session_state['chats'][chat_id]
+        st.session_state['chat_memories'].pop(chat_id, None)
+
+        if st.session_state['current_chat_id'] == chat_id:
+            st.session_state['current_chat_id'] = None
+            st.session_state['chat_history'] = []
+        try:
+            self.store.delete_chat(chat_id)
+            self.store.set_setting('current_chat_id', st.session_state['current_chat_id'])
+        except Exception as e:
+            logger.error(f"Error deleting chat {chat_id}: {str(e)}")
+
+    def save_message(self, role: str, message: str) -> None:
+        """Append a message to the current chat in the store"""
+        if not st.session_state['current_chat_id']:
+            return
+        try:
+            self.store.append_message(st.session_state['current_chat_id'], role, message)
+        except Exception as e:
+            logger.error(f"Error saving message: {str(e)}")
 
     def display_chat_selector(self) -> None:
         """Display chat selection sidebar"""
@@ -172,11 +247,11 @@ class StreamlitApp:
                 self.create_new_chat()
                 st.rerun()
 
-            for chat_id, chat_data in list(st.session_state['chats'].items()):
+            for chat_id, chat_name in list(st.session_state['chats'].items()):
                 cols = st.columns([5, 1])
 
                 if cols[0].button(
-                    chat_data['name'], 
+                    chat_name, 
                     key=f"chat_{chat_id}",
                     type="secondary" if chat_id != st.session_state['current_chat_id'] else "primary",
                     use_container_width=True
@@ -185,13 +260,7 @@ class StreamlitApp:
                     st.rerun()
 
                 if cols[1].button("🗑️", key=f"delete_{chat_id}"):
-                    del st.session_state['chats'][chat_id]
-                    
-                    if st.session_state['current_chat_id'] == chat_id:
-                        st.session_state['current_chat_id'] = None
-                        st.session_state['chat_history'] = []
-                    
-                    self.save_chat_history()
+                    self.delete_chat(chat_id)
                     st.rerun()
 
     def display_chat_messages(self) -> None:
@@ -215,18 +284,28 @@ class StreamlitApp:
                 with st.chat_message("user"):
                     st.write(prompt)
                 st.session_state['chat_history'].append(("You", prompt))
+                self.save_message("You", prompt)
                 
                 with st.chat_message("assistant"):
-                    with st.spinner("Thinking..."):
-                        response = self.gemini.get_response(prompt, st.session_state['chat_history'])
-                        st.write(response)
+                    latency = {}
+                    response = st.write_stream(
+                        self.gemini.stream_response(
+                            prompt,
+                            st.session_state['chat_history'][:-1],
+                            self.get_chat_memory(),
+                            latency
+                        )
+                    )
+                    st.caption(f"⏱️ First token: {latency['first_token']:.2f}s · Total: {latency['total']:.2f}s")
                     
                     st.session_state['chat_history'].append(("Bot", response))
+                    self.save_message("Bot", response)
+
+                # The reply is already on screen: summarizing old turns now costs no time to first token
+                self.get_chat_memory().fold(st.session_state['chat_history'], self.gemini.summarize)
                 
-                if st.session_state['current_chat_id']:
-                    st.session_state['chats'][st.session_state['current_chat_id']]['messages'] = st.session_state['chat_history']
-                    self.save_chat_history()
-                
+            except CircuitOpenError:
+                st.warning("Languito is taking a short break because the AI service is busy. Please try again in a minute.")
             except Exception as e:
                 st.error(f"An error occurred: {str(e)}")
                 logger.error(f"Error in main loop: {str(e)}")
@@ -1,23 +1,30 @@
 import streamlit as st
-import google.generativeai as genai
 from dotenv import load_dotenv
 import os
 import warnings
 import json
-from gtts import gTTS
-import base64
-from io import BytesIO
+import re
+import logging
+from services.llm import MODEL_LADDER, get_generative_model, get_model_router
+from services.dictionary_cache import DictionaryCache
+from services.dictionary import is_valid_context, lookup_words, read_word_list, export_results
+from services.tts import synthesize_many, text_to_speech as shared_text_to_speech
+from services.resilience import CircuitOpenError, call_with_retry, get_breaker
 
 # Load environment variables
 load_dotenv()
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 
-# Configure Gemini API
-genai.configure(api_key=GOOGLE_API_KEY)
-
 # Suppress warnings
 warnings.filterwarnings("ignore")
 
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Audio synthesis limits: concurrent gTTS requests and seconds allowed per clip
+AUDIO_WORKERS = 8
+AUDIO_TIMEOUT = 10
+
 # Streamlit app configuration
 st.set_page_config(page_title="Languito Dictionnary", page_icon="📖", layout="wide")
 
@@ -55,60 +62,110 @@ output_language = st.selectbox(
     list(LANGUAGE_CODES.keys())
 )
 
+@st.cache_resource(show_spinner=False)
+def get_dictionary_cache():
+    """Shared on-disk cache of word-context results"""
+    return DictionaryCache()
+
 def text_to_speech(text, lang_code):
     """
     Convert text to speech using gTTS
     """
     try:
-        # Ensure text is not empty
-        if not text or not text.strip():
-            return None
-        
-        tts = gTTS(text=text, lang=lang_code, slow=False)
-        buf = BytesIO()
-        tts.write_to_fp(buf)
-        buf.seek(0)
-        return buf
+        return synthesize_audio(text, lang_code)
     except Exception as e:
         st.error(f"Audio generation error for '{text}': {str(e)}")
         return None
 
-def get_audio_player(audio_bytes, key=None):
+def synthesize_audio(text, lang_code):
+    """
+    Convert text to speech through the shared audio cache without touching the page, so it can run on worker threads
+    """
+    # Ensure text is not empty
+    if not text or not text.strip():
+        return None
+
+    return shared_text_to_speech(text, lang_code, timeout=AUDIO_TIMEOUT)
+
+def show_audio_player(audio_bytes, autoplay=False):
     """
-    Create an HTML5 audio player for the generated speech
+    Play generated speech through Streamlit's media endpoint, so the browser fetches
+    each clip from a stable URL and can cache it instead of receiving it inline
     """
     if audio_bytes is None:
-        return ""
-    
-    b64 = base64.b64encode(audio_bytes.getvalue()).decode()
-    # Add unique key to prevent audio player conflicts
-    unique_key = f'key="{key}"' if key else ''
-    return f'<audio controls {unique_key}><source src="data:audio/mp3;base64,{b64}" type="audio/mp3"></audio>'
+        return
+    st.audio(audio_bytes, format="audio/mp3", autoplay=autoplay)
 
-def generate_audio_for_content(content, lang_code):
+def audio_control(text, lang_code, key):
     """
-    Generate audio for different content types
+    Show the clip for a text if it is ready, otherwise a button that synthesizes it on demand.
+    Clips are memoized for the session on top of the shared audio cache.
     """
-    audio_dict = {}
-    
-    # Check if content is a list or string
-    if isinstance(content, list):
-        for i, item in enumerate(content):
-            if item and item.strip():
-                audio = text_to_speech(item, lang_code)
-                if audio:
-                    audio_dict[f"item_{i}"] = audio
-    elif isinstance(content, str) and content.strip():
-        audio = text_to_speech(content, lang_code)
+    if not isinstance(text, str) or not text.strip():
+        return
+
+    session_audio = st.session_state['dictionary_audio']
+    audio_key = (lang_code, text)
+    if audio_key in session_audio:
+        show_audio_player(session_audio[audio_key])
+        return
+
+    if st.button("🔊", key=f"listen_{key}", help="Listen"):
+        audio = text_to_speech(text, lang_code)
         if audio:
-            audio_dict["main"] = audio
-    
-    return audio_dict
+            session_audio[audio_key] = audio.getvalue()
+            show_audio_player(session_audio[audio_key], autoplay=True)
+
+def display_card(title, text, lang_code, key):
+    """
+    Display a card with a text and its audio control
+    """
+    with st.container(border=True):
+        st.markdown(f"### {title}")
+        st.write(text)
+        audio_control(text, lang_code, key)
+
+def display_list_card(title, items, lang_code, key):
+    """
+    Display a card with one row per item, each with its audio control
+    """
+    with st.container(border=True):
+        st.markdown(f"### {title}")
+        for i, item in enumerate(items):
+            text_col, audio_col = st.columns([3, 2])
+            text_col.markdown(f"- {item}")
+            with audio_col:
+                audio_control(item, lang_code, f"{key}_{i}")
+
+def preload_audio(texts, lang_code):
+    """
+    Generate audio for all texts concurrently on a bounded thread pool and memoize it for the session.
+    Clips that fail or miss the deadline are left out instead of blocking the cards.
+    """
+    session_audio = st.session_state['dictionary_audio']
+    pending = [
+        text for text in texts
+        if isinstance(text, str) and text.strip() and (lang_code, text) not in session_audio
+    ]
+    if not pending:
+        return
+
+    clips, failed = synthesize_many(pending, lang_code, workers=AUDIO_WORKERS, timeout=AUDIO_TIMEOUT)
+    for text, audio in clips.items():
+        session_audio[(lang_code, text)] = audio
+
+    if failed:
+        st.warning(f"Audio could not be generated for {len(failed)} item(s).")
 
 def get_word_context(word, input_language, output_language):
     """
     Retrieve contextual information for a given word using Gemini API
     """
+    cache = get_dictionary_cache()
+    cached_result = cache.get(word, input_language, output_language)
+    if cached_result is not None:
+        return json.dumps(cached_result)
+
     prompt = f"""
     Provide a comprehensive linguistic analysis of the word "{word}" in {input_language}, and return the explanation in {output_language}. Include:
     1. Definition
@@ -129,25 +186,37 @@ def get_word_context(word, input_language, output_language):
     }}
     """
 
-    try:
-        model = genai.GenerativeModel('gemini-pro')
+    def request_context(model_name):
+        model = get_generative_model(GOOGLE_API_KEY, model_name)
         response = model.generate_content(prompt)
 
-        import re
         json_match = re.search(r'\{.*\}', response.text, re.DOTALL)
+        if not json_match:
+            raise ValueError("Unable to extract structured context.")
+        context_result = json.loads(json_match.group(0))
+        if not is_valid_context(context_result):
+            raise ValueError("Incomplete structured context.")
+        return context_result
 
-        if json_match:
-            json_str = json_match.group(0)
-            return json_str
-        else:
-            return json.dumps({
-                "definition": "Unable to extract structured context.",
-                "parts_of_speech": "Unknown",
-                "etymology": "Not available",
-                "examples": ["No examples could be generated."],
-                "synonyms": [],
-                "related_words": []
-            })
+    try:
+        # Rate limits and outages are retried with backoff; a malformed answer only moves on to the fallback model
+        # Slow requests are hedged with the fallback model; the first valid context wins
+        router = get_model_router("dictionary")
+        context_result = call_with_retry(
+            lambda: router.call(request_context), breaker=get_breaker("gemini"), max_attempts=3, retry_parse=False
+        )
+        cache.put(word, input_language, output_language, context_result)
+        return json.dumps(context_result)
+
+    except CircuitOpenError:
+        return json.dumps({
+            "definition": "The dictionary is temporarily unavailable. Please try again in a minute.",
+            "parts_of_speech": "Unknown",
+            "etymology": "Not available",
+            "examples": ["No examples could be generated."],
+            "synonyms": [],
+            "related_words": []
+        })
     
     except Exception as e:
         return json.dumps({
@@ -159,6 +228,19 @@ def get_word_context(word, input_language, output_language):
             "related_words": []
         })
 
+# Cache statistics
+cache_stats = get_dictionary_cache().stats()
+st.sidebar.caption(
+    f"📦 Dictionary cache: {cache_stats['entries']} words · "
+    f"{cache_stats['hits']} hits · {cache_stats['misses']} misses"
+)
+
+# Per-session state: the last result and the clips already played
+if 'word_context' not in st.session_state:
+    st.session_state['word_context'] = None
+if 'dictionary_audio' not in st.session_state:
+    st.session_state['dictionary_audio'] = {}
+
 # Word input
 col1, col2 = st.columns([3, 1])
 
@@ -170,7 +252,38 @@ with col2:
     st.write("")  # Spacer
     context_button = st.button("🔍 Explore", type="primary")
 
-# Context display
+# Batch lookup of a whole vocabulary list
+with st.expander("📚 Batch lookup (vocabulary list)"):
+    word_file = st.file_uploader("Upload a word list (one word per line)", type=["txt", "csv"])
+    if st.button("Look up all words", disabled=word_file is None):
+        words = read_word_list(word_file.getvalue().decode("utf-8", errors="ignore"))
+        progress_bar = st.progress(0.0)
+        with st.spinner(f"Looking up {len(words)} words..."):
+            batch_results, failed_words = lookup_words(
+                get_generative_model(GOOGLE_API_KEY, MODEL_LADDER[0]),
+                words,
+                input_language,
+                output_language,
+                cache=get_dictionary_cache(),
+                progress=lambda done, total: progress_bar.progress(done / total if total else 1.0)
+            )
+        st.success(f"{len(batch_results)} word(s) ready and saved to the dictionary cache.")
+        if failed_words:
+            st.warning(f"Could not look up: {', '.join(failed_words)}")
+        st.download_button(
+            label="Download results (JSON)",
+            data=export_results(batch_results, input_language, output_language),
+            file_name="dictionary_batch.json",
+            mime="application/json"
+        )
+
+preload_all_audio = st.toggle(
+    "Generate all audio up front",
+    value=False,
+    help="Off: each clip is generated when you click its 🔊 button"
+)
+
+# Context lookup
 if context_button and word_input:
     with st.spinner('Fetching word context...'):
         context_result_str = get_word_context(word_input, input_language, output_language)
@@ -187,128 +300,61 @@ if context_button and word_input:
             "related_words": []
         }
 
-    # Determine language code for audio generation from the output language
-    audio_lang_code = LANGUAGE_CODES.get(output_language, 'en')
-
-    # Generate audio for various content
-    audio_contents = {
-        "word": generate_audio_for_content(word_input, audio_lang_code),
-        "definition": generate_audio_for_content(context_result.get('definition', ''), audio_lang_code),
-        "parts_of_speech": generate_audio_for_content(context_result.get('parts_of_speech', ''), audio_lang_code),
-        "etymology": generate_audio_for_content(context_result.get('etymology', ''), audio_lang_code),
-        "examples": generate_audio_for_content(context_result.get('examples', []), audio_lang_code),
-        "synonyms": generate_audio_for_content(context_result.get('synonyms', []), audio_lang_code),
-        "related_words": generate_audio_for_content(context_result.get('related_words', []), audio_lang_code)
+    # Keep the result so the audio buttons can rerun the page without losing it
+    st.session_state['word_context'] = {
+        "word": word_input,
+        "result": context_result,
+        # Determine language code for audio generation from the output language
+        "lang_code": LANGUAGE_CODES.get(output_language, 'en')
     }
 
-    # Display word with audio in the same line but with added space
-    st.markdown(f"""
-        ### 🔤 Word: 
-        <span style='display: flex; align-items: center;'>
-            {word_input}
-            <span style='margin-left: 10px;'> 
-                {get_audio_player(audio_contents['word'].get('main'), 'word') if audio_contents['word'] else ''}
-            </span>
-        </span>
-    """, unsafe_allow_html=True)
-    
+# Context display
+if st.session_state['word_context']:
+    word = st.session_state['word_context']['word']
+    context_result = st.session_state['word_context']['result']
+    audio_lang_code = st.session_state['word_context']['lang_code']
+
+    if preload_all_audio:
+        with st.spinner('Generating audio...'):
+            texts = [word]
+            for value in context_result.values():
+                texts.extend(value if isinstance(value, list) else [value])
+            preload_audio(texts, audio_lang_code)
+
+    # Display word with audio
+    st.markdown(f"### 🔤 Word: {word}")
+    audio_control(word, audio_lang_code, "word")
+
     # Display the results in card layout
-    st.markdown("<div class='card-container'>", unsafe_allow_html=True)
-
-    # Definition Card
-    st.markdown(f"""
-    <div class='card'>
-        <h3>📘 Definition</h3>
-        <p>{context_result.get('definition', 'No definition found.')}</p>
-        <div style='margin-top: 10px;'>
-            {get_audio_player(next(iter(audio_contents['definition'].values()), None), 'definition') if audio_contents['definition'] else ''}
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Parts of Speech Card
-    st.markdown(f"""
-    <div class='card'>
-        <h3>📝 Parts of Speech</h3>
-        <p>{context_result.get('parts_of_speech', 'Unknown')}</p>
-        <div style='margin-top: 10px;'>
-            {get_audio_player(next(iter(audio_contents['parts_of_speech'].values()), None), 'parts_of_speech') if audio_contents['parts_of_speech'] else ''}
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Example Sentences Card
-    st.markdown("""
-    <div class='card'>
-        <h3>🗣️ Example Usage</h3>
-        <ul>
-    """, unsafe_allow_html=True)
-    
-    examples = context_result.get('examples', ['No examples available.'])
-    for i, example in enumerate(examples):
-        st.markdown(f"""
-            <li><span style='display: flex; align-items: center;'>
-                {example} 
-                <span style='margin-left: 10px;'> 
-                    {get_audio_player(audio_contents['examples'].get(f'item_{i}'), f'example_{i}') if audio_contents['examples'] else ''}
-                </span>
-            </span></li>
-        """, unsafe_allow_html=True)
-    
-    st.markdown("</ul></div>", unsafe_allow_html=True)
-
-    # Etymology Card
-    st.markdown(f"""
-    <div class='card'>
-        <h3>🕰️ Etymology</h3>
-        <p>{context_result.get('etymology', 'Etymology not found.')}</p>
-        <div style='margin-top: 10px;'>
-            {get_audio_player(next(iter(audio_contents['etymology'].values()), None), 'etymology') if audio_contents['etymology'] else ''}
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Synonyms Card
+    display_card(
+        "📘 Definition",
+        context_result.get('definition', 'No definition found.'),
+        audio_lang_code,
+        "definition"
+    )
+    display_card(
+        "📝 Parts of Speech",
+        context_result.get('parts_of_speech', 'Unknown'),
+        audio_lang_code,
+        "parts_of_speech"
+    )
+    display_list_card(
+        "🗣️ Example Usage",
+        context_result.get('examples', ['No examples available.']),
+        audio_lang_code,
+        "example"
+    )
+    display_card(
+        "🕰️ Etymology",
+        context_result.get('etymology', 'Etymology not found.'),
+        audio_lang_code,
+        "etymology"
+    )
+
     synonyms = context_result.get('synonyms', [])
     if synonyms:
-        st.markdown("""
-        <div class='card'>
-            <h3>📚 Synonyms</h3>
-            <p>
-        """, unsafe_allow_html=True)
-        
-        for i, synonym in enumerate(synonyms):
-            st.markdown(f"""
-                <span style='display: flex; align-items: center;'>
-                    {synonym} 
-                    <span style='margin-left: 10px;'> 
-                        {get_audio_player(audio_contents['synonyms'].get(f'item_{i}'), f'synonym_{i}') if audio_contents['synonyms'] else ''}
-                    </span>
-                </span>
-            """, unsafe_allow_html=True)
-        
-        st.markdown("</p></div>", unsafe_allow_html=True)
-    
-    # Related Words Card
+        display_list_card("📚 Synonyms", synonyms, audio_lang_code, "synonym")
+
     related_words = context_result.get('related_words', [])
     if related_words:
-        st.markdown("""
-        <div class='card'>
-            <h3>🔍 Related Words</h3>
-            <p>
-        """, unsafe_allow_html=True)
-        
-        for i, related_word in enumerate(related_words):
-            st.markdown(f"""
-                <span style='display: flex; align-items: center;'>
-                    {related_word} 
-                    <span style='margin-left: 10px;'> 
-                        {get_audio_player(audio_contents['related_words'].get(f'item_{i}'), f'related_{i}') if audio_contents['related_words'] else ''}
-                    </span>
-                </span>
-            """, unsafe_allow_html=True)
-        
-        st.markdown("</p></div>", unsafe_allow_html=True)
-    
-    st.markdown("</div>", unsafe_allow_html=True)
-
+        display_list_card("🔍 Related Words", related_words, audio_lang_code, "related")
@@ -2,9 +2,10 @@ import streamlit as st
 import requests
 import os
 from dotenv import load_dotenv
-from gtts import gTTS
-import base64
-from io import BytesIO
+from services.http_client import get_http_client
+from services.translation_memory import TranslationMemory, translate_segments
+from services.documents import SUPPORTED_TYPES, extract_text
+from services.tts import speak_progressively
 
 # Load environment variables
 load_dotenv()
@@ -18,30 +19,67 @@ except KeyError:
 
 headers = {"Authorization": f"Bearer {API_TOKEN}"}
 
-def translate(text, source_lang, target_lang):
+# Batched requests in flight at once; matches the HTTP client's per-host limit
+TRANSLATION_WORKERS = 4
+
+@st.cache_resource(show_spinner=False)
+def get_translation_memory():
+    """Sentence translations shared by all sessions and kept across restarts"""
+    return TranslationMemory()
+
+def request_translations(segments, source_lang, target_lang):
+    # One request per batch of sentences: the inference API accepts a list of inputs
     model_url = API_URL.format(source_lang, target_lang)
-    payload = {"inputs": text}
-    response = requests.post(model_url, headers=headers, json=payload)
-    if response.status_code == 200:
-        return response.json()[0]['translation_text']
-    else:
-        st.error(f"Translation failed. Status code: {response.status_code}")
+    payload = {"inputs": segments}
+    response = get_http_client().post(model_url, headers=headers, json=payload)
+    response.raise_for_status()
+    results = response.json()
+    if isinstance(results, dict):
+        # A 200 can still carry {"error": ...} instead of translations
+        raise ValueError(results.get("error", "no translations in the response"))
+    return [(item[0] if isinstance(item, list) else item)['translation_text'] for item in results]
+
+def translate(text, source_lang, target_lang, on_progress=None):
+    try:
+        translated_text, reused, _ = translate_segments(
+            text, source_lang, target_lang, get_translation_memory(),
+            lambda segments: request_translations(segments, source_lang, target_lang),
+            workers=TRANSLATION_WORKERS, on_progress=on_progress
+        )
+    except requests.Timeout:
+        st.error("Translation timed out. The translation service is slow right now, please try again.")
         return None
-
-def text_to_speech(text, lang):
+    except requests.ConnectionError:
+        st.error("Could not reach the translation service. Please check your connection.")
+        return None
+    except requests.HTTPError as e:
+        st.error(f"Translation failed. Status code: {e.response.status_code}")
+        return None
+    except (ValueError, KeyError, TypeError, IndexError) as e:
+        # Malformed answers and segment-count mismatches; the document path has no other handler
+        st.error(f"The translation service returned an unexpected answer: {str(e)}")
+        return None
+    if reused:
+        st.caption(f"{reused} sentence(s) reused from the translation memory")
+    return translated_text
+
+def show_partial(placeholder, status):
+    # Show the translated beginning of the text while the remaining batches are still in flight
+    def update(partial_text, done, total):
+        placeholder.markdown(f'<div class="output-area">{partial_text}</div>', unsafe_allow_html=True)
+        status.text(f"Translated {done}/{total} parts...")
+    return update
+
+def speak(container, text, lang):
+    # Up to 5000 characters: play the first sentence chunk as soon as it is ready, then swap in the full clip
     try:
-        tts = gTTS(text=text, lang=lang, slow=False)
-        buf = BytesIO()
-        tts.write_to_fp(buf)
-        buf.seek(0)
-        return buf
+        speak_progressively(text, lang, lambda clip, start_time: play_audio(container, clip, start_time))
     except Exception as e:
         st.error(f"An error occurred during speech synthesis: {str(e)}")
-        return None
 
-def get_audio_player(audio_bytes):
-    b64 = base64.b64encode(audio_bytes.getvalue()).decode()
-    return f'<audio autoplay style="display: none"><source src="data:audio/mp3;base64,{b64}" type="audio/mp3"></audio>'
+def play_audio(container, audio_bytes, start_time=0):
+    # Served from Streamlit's media endpoint so the browser can cache the clip
+    container.audio(audio_bytes, format="audio/mp3", start_time=start_time, autoplay=True)
 
 # Initialize session state for audio containers
 if 'audio_container_input' not in st.session_state:
@@ -103,9 +141,7 @@ with col_input:
         audio_container_input = st.empty()
         if st.button("🔊", key="input_speech", help="Listen to text", kwargs={"className": "speech-button"}):
             if input_text:
-                audio_bytes = text_to_speech(input_text, source_code)
-                if audio_bytes:
-                    audio_container_input.markdown(get_audio_player(audio_bytes), unsafe_allow_html=True)
+                speak(audio_container_input, input_text, source_code)
     char_count = len(input_text)
     word_count = len(input_text.split())
     st.text(f"Character count: {char_count} | Word count: {word_count}")
@@ -124,16 +160,15 @@ with col_output:
         audio_container_output = st.empty()
         if st.button("🔊", key="output_speech", help="Listen to translation", kwargs={"className": "speech-button"}):
             if st.session_state.translated_text:
-                audio_bytes = text_to_speech(st.session_state.translated_text, target_code)
-                if audio_bytes:
-                    audio_container_output.markdown(get_audio_player(audio_bytes), unsafe_allow_html=True)
+                speak(audio_container_output, st.session_state.translated_text, target_code)
 
 # Translate button
 if st.button("🔄 Translate", type="primary"):
     if input_text:
         try:
             with st.spinner("Translating..."):
-                translated_text = translate(input_text, source_code, target_code)
+                translated_text = translate(input_text, source_code, target_code,
+                                            show_partial(output_placeholder, output_char_count))
             if translated_text:
                 st.session_state.translated_text = translated_text
                 output_placeholder.markdown(f'<div class="output-area">{translated_text}</div>', unsafe_allow_html=True)
@@ -143,6 +178,38 @@ if st.button("🔄 Translate", type="primary"):
     else:
         st.warning("Please enter some text to translate.")
 
+# Document translation: long files are chunked under the model's input limit and translated in parallel
+with st.expander("📄 Translate a document"):
+    uploaded_file = st.file_uploader("Upload a document", type=SUPPORTED_TYPES,
+                                     help="Plain text or PDF; any length")
+    document_output = st.empty()
+    document_status = st.empty()
+    if uploaded_file and st.button("Translate document"):
+        try:
+            document_text = extract_text(uploaded_file.name, uploaded_file.getvalue())
+        except Exception as e:
+            st.error(f"Could not read {uploaded_file.name}: {str(e)}")
+            document_text = ""
+        if document_text.strip():
+            with st.spinner(f"Translating {uploaded_file.name}..."):
+                translated_document = translate(document_text, source_code, target_code,
+                                                show_partial(document_output, document_status))
+            if translated_document:
+                st.session_state.document_translation = (uploaded_file.name, translated_document)
+        else:
+            st.warning("No text found in this document.")
+
+    if st.session_state.get("document_translation"):
+        document_name, translated_document = st.session_state.document_translation
+        document_output.text_area("Translated document", translated_document, height=300)
+        document_status.text(f"Character count: {len(translated_document)} | Word count: {len(translated_document.split())}")
+        st.download_button(
+            label="Download translation",
+            data=translated_document,
+            file_name=f"{os.path.splitext(document_name)[0]}_{target_code}.txt",
+            mime="text/plain"
+        )
+
 # Additional features
 st.markdown("---")
 col3, col4 = st.columns(2)
@@ -161,7 +228,7 @@ with col4:
     st.markdown("### Usage Tips")
     st.success("""
     - For best results, enter clear and complete sentences
-    - Maximum recommended length: 5000 characters per translation
+    - Maximum recommended length: 5000 characters per translation; upload a document for longer texts
     - Supports multiple paragraphs
     - Use the language selection dropdowns to choose your desired languages
     - Click on the speaker icon to hear the text spoken
@@ -1,230 +1,87 @@
 
-from dotenv import load_dotenv
 import streamlit as st
 import os
-import google.generativeai as genai
-from typing import Iterator, Dict, List
+from typing import Callable, Dict, List, Set
 import logging
-import json
-import random
-import hashlib
+import time
+import threading
+from services.quiz_generator import GeminiQuiz
+from services.question_bank import QuestionBank
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class GeminiQuiz:
-    def __init__(self):
-        load_dotenv()
-        # self.api_key = os.getenv("GOOGLE_API_KEY")
-        try:
-            self.api_key = os.getenv("GOOGLE_API_KEY") or st.secrets["GOOGLE_API_KEY"]
-        except KeyError:
-            st.error("Google API Key is not set. Please provide it as an environment variable or in Streamlit secrets.")
-
+class QuestionPrefetcher:
+    """Collects questions generated on a background thread until the script thread picks them up"""
 
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.ready = threading.Condition(self.lock)
+        self.pending = []
+        self.finished = False
+        self.cancelled = False
 
-        if not self.api_key:
-            raise ValueError("GOOGLE_API_KEY not found in environment variables")
-        
-        self.setup_genai()
-        self.max_retries = 5
-        
-        # Initialize question history in session state if not exists
-        if 'question_history' not in st.session_state:
-            st.session_state.question_history = set()
-        
-        # Track used difficulties to ensure variety
-        if 'used_difficulties' not in st.session_state:
-            st.session_state.used_difficulties = []
-            
-    def setup_genai(self) -> None:
-        try:
-            genai.configure(api_key=self.api_key)
-            self.model = genai.GenerativeModel("gemini-pro")
-        except Exception as e:
-            logger.error(f"Error setting up Gemini: {str(e)}")
-            raise
-
-    def get_balanced_difficulty(self) -> str:
-        """Ensure a balanced distribution of difficulty levels"""
-        difficulties = ["beginner", "intermediate", "advanced"]
-        
-        if len(st.session_state.used_difficulties) >= 10:  # Reset after 10 questions
-            st.session_state.used_difficulties = []
-            
-        # Count current difficulty distribution
-        difficulty_counts = {diff: st.session_state.used_difficulties.count(diff) for diff in difficulties}
-        
-        # Filter out overused difficulties (more than 1/3 of total questions)
-        available_difficulties = [
-            diff for diff in difficulties 
-            if difficulty_counts[diff] < (len(st.session_state.used_difficulties) + 1) / 3
-        ]
-        
-        # If all difficulties are equally distributed, allow any
-        if not available_difficulties:
-            available_difficulties = difficulties
-            
-        selected_difficulty = random.choice(available_difficulties)
-        st.session_state.used_difficulties.append(selected_difficulty)
-        return selected_difficulty
-
-    def get_language_prompt(self, user_language: str, target_language: str, category: str) -> str:
-        """Generate appropriate prompt based on languages and category"""
-        difficulty_levels = {
-            "beginner": "basic vocabulary and simple structures",
-            "intermediate": "moderate complexity and common usage patterns",
-            "advanced": "complex language features and nuanced usage"
-        }
-        
-        base_difficulty = self.get_balanced_difficulty()
-        
-        # Add specific constraints to ensure uniqueness
-        base_constraints = f"""
-            Constraints for generating unique questions:
-            - Use diverse question formats (fill-in-blank, scenario-based, translation, etc.)
-            - Include practical, real-world contexts
-            - Vary the topics within the category
-            - Ensure cultural relevance to {target_language}-speaking regions
-            - Don't repeat common textbook examples
-        """
-        
-        prompts = {
-            "Grammar": f"""
-                Generate a {base_difficulty}-level multiple-choice question for language learning.
-                Context: Question about {target_language} grammar, written in {user_language}.
-                Focus Area: {difficulty_levels[base_difficulty]}
-                {base_constraints}
-                Additional Grammar-specific requirements:
-                - Include varied sentence structures
-                - Focus on practical usage rather than technical terms
-                - Incorporate common language patterns
-                
-                Return strictly in this JSON format:
-                {{
-                    "question": "Clear, well-formulated question",
-                    "options": ["Option 1", "Option 2", "Option 3", "Option 4"],
-                    "correct_answer": "The correct option exactly as written in options",
-                    "explanation": "Detailed explanation of why the answer is correct",
-                    "difficulty": "{base_difficulty}",
-                    "topic": "Specific grammar topic covered"
-                }}
-            """,
-            "Vocabulary": f"""
-                Generate a {base_difficulty}-level vocabulary question for language learning.
-                Context: Question about {target_language} vocabulary, written in {user_language}.
-                Focus Area: {difficulty_levels[base_difficulty]}
-                {base_constraints}
-                Additional Vocabulary-specific requirements:
-                - Use words in context-rich situations
-                - Include collocations and common word pairs
-                - Focus on frequency-based vocabulary selection
-                
-                Return strictly in this JSON format:
-                {{
-                    "question": "Clear, well-formulated question",
-                    "options": ["Option 1", "Option 2", "Option 3", "Option 4"],
-                    "correct_answer": "The correct option exactly as written in options",
-                    "explanation": "Detailed explanation including usage examples",
-                    "difficulty": "{base_difficulty}",
-                    "topic": "Specific vocabulary theme"
-                }}
-            """,
-            "Common Phrases": f"""
-                Generate a {base_difficulty}-level question about common phrases.
-                Context: Question about {target_language} expressions, written in {user_language}.
-                Focus Area: {difficulty_levels[base_difficulty]}
-                {base_constraints}
-                Additional Phrase-specific requirements:
-                - Include contemporary expressions
-                - Focus on situational appropriateness
-                - Cover various social contexts
-                
-                Return strictly in this JSON format:
-                {{
-                    "question": "Clear, well-formulated question",
-                    "options": ["Option 1", "Option 2", "Option 3", "Option 4"],
-                    "correct_answer": "The correct option exactly as written in options",
-                    "explanation": "Detailed explanation with cultural context",
-                    "difficulty": "{base_difficulty}",
-                    "topic": "Specific phrase category or situation"
-                }}
-            """
-        }
-        
-        return prompts[category] + "\nProvide only the JSON response without any additional text."
-
-    def calculate_question_hash(self, question_data: Dict) -> str:
-        """Calculate a unique hash for a question based on its content"""
-        # Create a string combining multiple aspects of the question
-        question_string = (
-            f"{question_data['question'].lower()}"
-            f"{','.join(sorted(opt.lower() for opt in question_data['options']))}"
-            f"{question_data['correct_answer'].lower()}"
-            f"{question_data.get('topic', '').lower()}"
-        )
-        return hashlib.md5(question_string.encode()).hexdigest()
-
-    def is_question_unique(self, question_data: Dict) -> bool:
-        """Check if a question is unique based on its content"""
-        question_hash = self.calculate_question_hash(question_data)
-        if question_hash in st.session_state.question_history:
-            return False
-        st.session_state.question_history.add(question_hash)
-        return True
-
-    def generate_question(self, user_language: str, target_language: str, category: str) -> Dict:
-        for attempt in range(self.max_retries):
+    def start(self, generate: Callable[[Callable[[Dict], None]], None]) -> None:
+        """Run generate(add) on a daemon thread; generate calls add for every question"""
+        def run():
             try:
-                prompt = self.get_language_prompt(user_language, target_language, category)
-                response = self.model.generate_content(prompt)
-                
-                # Clean and parse response
-                response_text = response.text.strip()
-                if "```json" in response_text:
-                    response_text = response_text.split("```json")[1].split("```")[0]
-                elif "```" in response_text:
-                    response_text = response_text.split("```")[1]
-                
-                response_text = (
-                    response_text.strip()
-                    .replace('\n', '')
-                    .replace('\r', '')
-                    .replace('\t', '')
-                )
-                
-                question_data = json.loads(response_text)
-                
-                # Validate question format
-                required_fields = ["question", "options", "correct_answer", "explanation", "difficulty"]
-                if not all(field in question_data for field in required_fields):
-                    logger.warning("Missing required fields, retrying...")
-                    continue
-                
-                if not isinstance(question_data["options"], list) or len(question_data["options"]) != 4:
-                    logger.warning("Invalid options format, retrying...")
-                    continue
-                
-                if question_data["correct_answer"] not in question_data["options"]:
-                    logger.warning("Correct answer not in options, retrying...")
-                    continue
-                
-                if self.is_question_unique(question_data):
-                    return question_data
-                
-                logger.info(f"Duplicate question on attempt {attempt + 1}, retrying...")
-                
+                generate(self.add)
             except Exception as e:
-                logger.error(f"Error on attempt {attempt + 1}: {str(e)}")
-                continue
-        
-        raise ValueError("Failed to generate a valid unique question after maximum retries")
-    
+                logger.error(f"Error prefetching questions: {str(e)}")
+            finally:
+                with self.ready:
+                    self.finished = True
+                    self.ready.notify_all()
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def add(self, question: Dict) -> None:
+        with self.ready:
+            if not self.cancelled:
+                self.pending.append(question)
+                self.ready.notify_all()
+
+    def take(self) -> List[Dict]:
+        """Return and clear the questions that arrived since the last call"""
+        with self.lock:
+            questions, self.pending = self.pending, []
+        return questions
+
+    def wait(self, timeout: float) -> None:
+        """Block until a question arrives, generation finishes or the timeout expires"""
+        with self.ready:
+            if not self.pending and not self.finished:
+                self.ready.wait(timeout)
+
+    def is_running(self) -> bool:
+        with self.lock:
+            return not self.finished
+
+    def cancel(self) -> None:
+        with self.lock:
+            self.cancelled = True
+            self.pending = []
+
+@st.cache_resource(show_spinner=False)
+def get_question_bank() -> QuestionBank:
+    """Shared persistent bank of validated questions"""
+    return QuestionBank()
+
+@st.cache_resource(show_spinner=False)
+def get_gemini_quiz() -> GeminiQuiz:
+    """Shared GeminiQuiz; question history and difficulties are tracked per session"""
+    quiz = GeminiQuiz()
+    threshold = float(os.getenv("QUIZ_SIMILARITY_THRESHOLD", "0.6"))
+    quiz.near_duplicate_index = get_question_bank().build_near_duplicate_index(threshold)
+    return quiz
+
 class QuizApp:
     def __init__(self):
+        start_time = time.perf_counter()
         self.setup_page()
         self.initialize_session_state()
-        self.quiz = GeminiQuiz()
+        self.quiz = get_gemini_quiz()
+        self.bank = get_question_bank()
         self.available_languages = {
             "English": "🇬🇧",
             "Spanish": "🇪🇸",
@@ -238,6 +95,10 @@ class QuizApp:
         }
         self.categories = ["Grammar", "Vocabulary", "Common Phrases"]
         self.num_questions = 10
+        self.max_workers = 5
+        # Ask for all questions in one request and refill only the invalid slots
+        self.batch_generation = True
+        logger.info(f"Quiz page setup took {(time.perf_counter() - start_time) * 1000:.1f} ms")
 
     def setup_page(self) -> None:
         st.set_page_config(
@@ -259,29 +120,129 @@ class QuizApp:
             st.session_state['user_answers'] = {}
         if 'quiz_completed' not in st.session_state:
             st.session_state['quiz_completed'] = False
+        # Question history is kept per session so the shared GeminiQuiz stays stateless
+        if 'question_history' not in st.session_state:
+            st.session_state.question_history = set()
+        # Track used difficulties to ensure variety
+        if 'used_difficulties' not in st.session_state:
+            st.session_state.used_difficulties = []
+        if 'question_prefetcher' not in st.session_state:
+            st.session_state['question_prefetcher'] = None
 
-    def generate_quiz_questions(self, user_language: str, target_language: str, category: str) -> List[Dict]:
+    def start_quiz(self, user_language: str, target_language: str, category: str) -> None:
+        """
+        Serve questions from the bank first. Whatever the user has not seen there is generated:
+        the quiz starts as soon as the first question is ready and the rest is prefetched in the background.
+        """
+        # Session state is only available on the script thread, so plan difficulties here
+        difficulties = [self.quiz.get_balanced_difficulty() for _ in range(self.num_questions)]
+        question_history = st.session_state.question_history
+
+        start_time = time.perf_counter()
+        banked, difficulties = self.bank.draw(
+            user_language, target_language, category, difficulties, question_history
+        )
         questions = []
-        for _ in range(self.num_questions):
-            try:
-                question = self.quiz.generate_question(user_language, target_language, category)
-                questions.append(question)
-            except Exception as e:
-                logger.error(f"Error generating question: {str(e)}")
-                continue
-        return questions
+        for question_hash, question in banked:
+            question_history.add(question_hash)
+            questions.append(question)
+
+        def bank_question(question: Dict) -> Dict:
+            self.bank.add(
+                self.quiz.calculate_question_hash(question), question,
+                user_language, target_language, category
+            )
+            return question
+
+        if not questions:
+            questions.append(bank_question(self.quiz.generate_question(
+                user_language, target_language, category, difficulties.pop(0), question_history
+            )))
+        logger.info(
+            f"First question ready in {time.perf_counter() - start_time:.2f}s "
+            f"({len(banked)} served from the question bank)"
+        )
+        st.session_state['current_questions'] = questions
+
+        if difficulties:
+            prefetcher = QuestionPrefetcher()
+            prefetcher.start(lambda add: self.generate_quiz_questions(
+                user_language, target_language, category, difficulties, question_history,
+                lambda question: add(bank_question(question))
+            ))
+            st.session_state['question_prefetcher'] = prefetcher
+
+    def generate_quiz_questions(self, user_language: str, target_language: str, category: str,
+                                difficulties: List[str], question_history: Set[str],
+                                on_question: Callable[[Dict], None]) -> None:
+        """Generate questions off the script thread, batched in one request first when enabled"""
+        start_time = time.perf_counter()
+        if self.batch_generation:
+            # Whatever the batch could not fill falls back to one request per question
+            questions, difficulties = self.quiz.generate_questions_batch(
+                user_language, target_language, category, difficulties, question_history
+            )
+            for question in questions:
+                on_question(question)
+
+        if difficulties:
+            self.generate_concurrently(
+                user_language, target_language, category, difficulties, question_history, on_question
+            )
+        logger.info(f"Background questions generated in {time.perf_counter() - start_time:.2f}s")
+
+    def generate_concurrently(self, user_language: str, target_language: str, category: str,
+                              difficulties: List[str], question_history: Set[str],
+                              on_question: Callable[[Dict], None]) -> None:
+        """Generate one question per difficulty concurrently on a bounded worker pool"""
+        self.quiz.generate_concurrently(
+            user_language, target_language, category, difficulties, question_history, on_question,
+            max_workers=self.max_workers
+        )
+
+    def collect_prefetched_questions(self) -> None:
+        """Append the questions the background thread produced since the last rerun"""
+        prefetcher = st.session_state['question_prefetcher']
+        if prefetcher:
+            st.session_state['current_questions'].extend(prefetcher.take())
+
+    def is_prefetching(self) -> bool:
+        prefetcher = st.session_state['question_prefetcher']
+        return prefetcher is not None and prefetcher.is_running()
+
+    def total_questions(self) -> int:
+        """Planned quiz length while prefetching, then the number of questions actually generated"""
+        if self.is_prefetching():
+            return self.num_questions
+        return len(st.session_state['current_questions']) or self.num_questions
+
+    def reset_quiz(self) -> None:
+        prefetcher = st.session_state['question_prefetcher']
+        if prefetcher:
+            prefetcher.cancel()
+        st.session_state['question_prefetcher'] = None
+        st.session_state['current_questions'] = []
+        st.session_state['current_question_idx'] = 0
+        st.session_state['score'] = 0
+        st.session_state['user_answers'] = {}
+        st.session_state['quiz_completed'] = False
 
     def display_progress(self) -> None:
-        progress = (st.session_state['current_question_idx'] + 1) / self.num_questions
-        st.progress(progress)
-        st.write(f"Question {st.session_state['current_question_idx'] + 1} of {self.num_questions}")
+        total_questions = self.total_questions()
+        progress = (st.session_state['current_question_idx'] + 1) / total_questions
+        st.progress(min(progress, 1.0))
+        st.write(f"Question {st.session_state['current_question_idx'] + 1} of {total_questions}")
+        if self.is_prefetching():
+            ready = len(st.session_state['current_questions'])
+            st.caption(f"{ready} of {total_questions} questions ready, more are on the way...")
 
     def display_final_results(self) -> None:
         st.title("Quiz Complete! 🎉")
         final_score = st.session_state['score']
-        percentage = (final_score / self.num_questions) * 100
+        total_questions = self.total_questions()
+        percentage = (final_score / total_questions) * 100
         
-        st.header(f"Your Score: {final_score}/{self.num_questions} ({percentage:.1f}%)")
+        st.header(f"Your Score: {final_score}/{total_questions} ({percentage:.1f}%)")
         
         if percentage >= 90:
             st.balloons()
@@ -334,21 +295,43 @@ class QuizApp:
             
             if not st.session_state['quiz_started']:
                 if st.button("Start Quiz"):
-                    st.session_state['current_questions'] = self.generate_quiz_questions(
-                        user_language, target_language, selected_category
-                    )
-                    st.session_state['quiz_started'] = True
-                    st.session_state['current_question_idx'] = 0
-                    st.session_state['score'] = 0
-                    st.session_state['user_answers'] = {}
-                    st.session_state['quiz_completed'] = False
-                    st.rerun()
+                    self.reset_quiz()
+                    try:
+                        with st.spinner("Preparing your first question..."):
+                            self.start_quiz(user_language, target_language, selected_category)
+                    except Exception as e:
+                        st.error(f"Could not generate a question: {str(e)}")
+                    else:
+                        st.session_state['quiz_started'] = True
+                        st.rerun()
 
             st.divider()
-            st.metric("Current Score", f"{st.session_state['score']}/{self.num_questions}")
+            st.metric("Current Score", f"{st.session_state['score']}/{self.total_questions()}")
+
+            duplicate_stats = self.quiz.near_duplicate_index.stats()
+            st.caption(
+                f"🧹 Duplicates rejected: {self.quiz.exact_duplicates} exact, "
+                f"{duplicate_stats['near_duplicates']} near "
+                f"({duplicate_stats['rejection_rate']:.0%} of {duplicate_stats['checked']} checks)"
+            )
+
+        self.collect_prefetched_questions()
 
         # Main content area
         if st.session_state['quiz_started'] and not st.session_state['quiz_completed']:
+            if st.session_state['current_question_idx'] >= len(st.session_state['current_questions']):
+                if self.is_prefetching():
+                    # The next question is still being generated in the background
+                    with st.spinner("Preparing the next question..."):
+                        st.session_state['question_prefetcher'].wait(timeout=1.0)
+                else:
+                    # Questions added between the collect above and the finish check are still pending
+                    self.collect_prefetched_questions()
+                    if st.session_state['current_question_idx'] >= len(st.session_state['current_questions']):
+                        # Generation finished with fewer questions than planned
+                        st.session_state['quiz_completed'] = True
+                st.rerun()
+
             self.display_progress()
             
             current_q = st.session_state['current_questions'][st.session_state['current_question_idx']]
@@ -369,7 +352,7 @@ class QuizApp:
                     if user_answer == current_q["correct_answer"]:
                         st.session_state['score'] += 1
                     
-                    if st.session_state['current_question_idx'] < self.num_questions - 1:
+                    if st.session_state['current_question_idx'] < self.total_questions() - 1:
                         st.session_state['current_question_idx'] += 1
                     else:
                         st.session_state['quiz_completed'] = True
@@ -385,12 +368,8 @@ class QuizApp:
             self.display_final_results()
             
             if st.button("Start New Quiz"):
+                self.reset_quiz()
                 st.session_state['quiz_started'] = False
-                st.session_state['current_questions'] = []
-                st.session_state['current_question_idx'] = 0
-                st.session_state['score'] = 0
-                st.session_state['user_answers'] = {}
-                st.session_state['quiz_completed'] = False
                 st.rerun()
 
 try:
@@ -1,8 +1,6 @@
 import streamlit as st
 import os
-from gtts import gTTS
-import base64
-from io import BytesIO
+from services.tts import speak_progressively
 
 # Streamlit page configuration
 st.set_page_config(page_title="PolyGlot Speech", page_icon="🎙", layout="wide")
@@ -46,30 +44,30 @@ char_count = len(input_text)
 word_count = len(input_text.split()) if input_text.strip() else 0
 st.text(f"Character count: {char_count} | Word count: {word_count}")
 
-def text_to_speech(text, lang):
+def generate_speech(text, lang, player):
+    # Long text is synthesized in parallel sentence chunks; the first one starts playing right away
+    # and the full clip then replaces it in the same player
     try:
-        tts = gTTS(text=text, lang=lang, slow=False)
-        buf = BytesIO()
-        tts.write_to_fp(buf)
-        buf.seek(0)
-        return buf
+        return speak_progressively(text, lang, lambda clip, start_time: play_audio(player, clip, start_time))
     except Exception as e:
         st.error(f"An error occurred during speech synthesis: {str(e)}")
         return None
 
-def get_audio_player(audio_bytes):
-    b64 = base64.b64encode(audio_bytes.getvalue()).decode()
-    return f'<audio controls autoplay="true"><source src="data:audio/mp3;base64,{b64}" type="audio/mp3"></audio>'
+def play_audio(player, audio_bytes, start_time=0):
+    # Served from Streamlit's media endpoint so the browser can cache the clip
+    player.audio(audio_bytes, format="audio/mp3", start_time=start_time, autoplay=True)
 
 # Generate speech button
 if st.button("🎙 Generate Speech", type="primary"):
     if input_text.strip():
+        st.markdown("### Generated Speech:")
+        player = st.empty()
         with st.spinner("Generating speech..."):
-            audio_bytes = text_to_speech(input_text, lang_code)
-            if audio_bytes:
-                st.markdown("### Generated Speech:")
-                st.markdown(get_audio_player(audio_bytes), unsafe_allow_html=True)
-                
+            result = generate_speech(input_text, lang_code, player)
+            if result:
+                audio_bytes, _, first_audio, total = result
+                st.caption(f"First audio after {first_audio:.2f}s · full clip after {total:.2f}s")
+
                 # Download button
                 st.download_button(
                     label="Download Audio",
@@ -0,0 +1,188 @@
+import os
+import sys
+import json
+import mmap
+import random
+import string
+import struct
+import logging
+import argparse
+import itertools
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from services.mp3 import join_clips
+
+logger = logging.getLogger(__name__)
+
+# Block quiz sentence templates and vocabulary
+TEMPLATES = [
+    "The {adjective} {noun} {verb} {adverb}.",
+    "{subject} {verb} {object} {adverb}.",
+    "In the {place}, {subject} {verb} {object}.",
+    "{timeframe}, {subject} will {verb} {object}.",
+    "{subject} {verb} {object} because {reason}."
+]
+
+WORDS = {
+    "adjective": ["happy", "sad", "excited", "curious", "friendly", "brave"],
+    "noun": ["cat", "dog", "bird", "child", "teacher", "student"],
+    "verb": ["runs", "jumps", "sings", "reads", "writes", "plays"],
+    "adverb": ["quickly", "slowly", "loudly", "quietly", "carefully", "happily"],
+    "subject": ["The boy", "The girl", "The teacher", "The dog", "My friend", "The student"],
+    "object": ["the ball", "a book", "the guitar", "homework", "a game", "the puzzle"],
+    "place": ["park", "school", "library", "garden", "playground", "museum"],
+    "timeframe": ["Tomorrow", "Next week", "In the future", "Soon", "Later today"],
+    "reason": ["it's fun", "it's important", "they enjoy it", "it's a hobby", "it's challenging"]
+}
+
+# Pack layout: MAGIC, uint32 index length, JSON index {sentence: [offset, length]}, MP3 data
+MAGIC = b"LQAPACK1"
+HEADER = struct.Struct("<8sI")
+
+# Pauses inserted between word clips when composing a sentence
+WORD_GAP_MS = 60
+CLAUSE_GAP_MS = 250
+
+def template_fields(template: str) -> List[str]:
+    return [field for _, field, _, _ in string.Formatter().parse(template) if field]
+
+def enumerate_sentences() -> Iterator[str]:
+    """Every sentence the block quiz templates can produce"""
+    for template in TEMPLATES:
+        fields = template_fields(template)
+        for choice in itertools.product(*(WORDS[field] for field in fields)):
+            yield template.format(**dict(zip(fields, choice)))
+
+def sentence_tokens(sentence: str) -> List[Tuple[str, int]]:
+    """Split a sentence into spoken words, each with the pause that follows it"""
+    tokens = []
+    for raw in sentence.split():
+        word = raw.strip(".,!?;:").lower()
+        if word:
+            tokens.append((word, CLAUSE_GAP_MS if raw[-1] in ",;:" else WORD_GAP_MS))
+    return tokens
+
+def vocabulary() -> List[str]:
+    """Every word the templates can speak, template text included"""
+    words = set()
+    for template in TEMPLATES:
+        literal = "".join(text for text, _, _, _ in string.Formatter().parse(template))
+        words.update(word for word, _ in sentence_tokens(literal))
+    for options in WORDS.values():
+        for option in options:
+            words.update(word for word, _ in sentence_tokens(option))
+    return sorted(words)
+
+def compose_sentence(sentence: str, lang: str = "en", synthesize_fn: Optional[Callable[[str, str], bytes]] = None,
+                     workers: int = 8) -> bytes:
+    """Build sentence audio by joining per-word clips, so only the vocabulary is ever synthesized.
+
+    Word clips come from the shared audio cache; once the vocabulary is warm
+    (python -m services.audio_pack --words) any sentence is composed offline.
+    """
+    if synthesize_fn is None:
+        from services.tts import synthesize as synthesize_fn
+
+    tokens = sentence_tokens(sentence)
+    unique_words = list(dict.fromkeys(word for word, _ in tokens))
+    with ThreadPoolExecutor(max_workers=min(workers, max(len(unique_words), 1))) as executor:
+        clips = dict(zip(unique_words, executor.map(lambda word: synthesize_fn(word, lang), unique_words)))
+    return join_clips([clips[word] for word, _ in tokens], [gap for _, gap in tokens])
+
+class AudioPack:
+    """Read-only, memory-mapped pack of sentence clips; a clip is a slice of the mapping"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self.mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_length = HEADER.unpack_from(self.mapping, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an audio pack")
+        index_start = HEADER.size
+        self.index: Dict[str, Tuple[int, int]] = json.loads(self.mapping[index_start:index_start + index_length])
+        self.data_start = index_start + index_length
+        self.sentences = list(self.index)
+
+    def get(self, sentence: str) -> Optional[bytes]:
+        entry = self.index.get(sentence)
+        if entry is None:
+            return None
+        offset, length = entry
+        start = self.data_start + offset
+        return self.mapping[start:start + length]
+
+    def __contains__(self, sentence: str) -> bool:
+        return sentence in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+def build_pack(output_path: str, sentences: List[str], lang: str = "en", workers: int = 8) -> int:
+    """Synthesize every sentence once and write them to a single indexed pack file"""
+    from services.tts import synthesize
+
+    index = {}
+    offset = 0
+    with tempfile.TemporaryFile() as data_file:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [(sentence, executor.submit(synthesize, sentence, lang)) for sentence in sentences]
+            for count, (sentence, future) in enumerate(futures, start=1):
+                try:
+                    clip = future.result()
+                except Exception as e:
+                    logger.error(f"Skipping '{sentence}': {str(e)}")
+                    continue
+                data_file.write(clip)
+                index[sentence] = [offset, len(clip)]
+                offset += len(clip)
+                if count % 100 == 0:
+                    logger.info(f"{count}/{len(sentences)} sentences synthesized")
+
+        index_bytes = json.dumps(index, ensure_ascii=False).encode("utf-8")
+        tmp_path = f"{output_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, len(index_bytes)))
+            f.write(index_bytes)
+            data_file.seek(0)
+            while True:
+                block = data_file.read(1024 * 1024)
+                if not block:
+                    break
+                f.write(block)
+        os.replace(tmp_path, output_path)
+    return len(index)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point: python -m services.audio_pack [--sample 500 | --words]"""
+    parser = argparse.ArgumentParser(description="Precompute the block quiz sentence audio pack")
+    parser.add_argument("--output", default="block_quiz_audio.pack")
+    parser.add_argument("--sample", type=int, help="Pack a random sample of sentences instead of all of them")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--words", action="store_true",
+                        help="Only warm the audio cache with per-word clips for composed sentences")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.words:
+        from services.tts import synthesize
+
+        words = vocabulary()
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            list(executor.map(lambda word: synthesize(word, "en"), words))
+        logger.info(f"Cached clips for {len(words)} words")
+        return 0
+
+    sentences = list(enumerate_sentences())
+    if args.sample and args.sample < len(sentences):
+        sentences = random.Random(args.seed).sample(sentences, args.sample)
+    logger.info(f"Building {args.output} with {len(sentences)} sentences")
+
+    packed = build_pack(args.output, sentences, workers=args.workers)
+    logger.info(f"Wrote {packed} clips to {args.output} ({os.path.getsize(args.output) / 1e6:.1f} MB)")
+    return 0 if packed else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
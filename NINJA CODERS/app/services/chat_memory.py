@@ -0,0 +1,106 @@
+import logging
+from typing import Callable, List, Tuple
+from services.translation_memory import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+class TokenBudgetMemory:
+    """Conversation memory that keeps recent turns verbatim and summarizes older ones.
+
+    format_history only renders: the summary, then the newest messages that fit the window.
+    fold runs after the reply, off the time-to-first-token path, and folds messages into the
+    summary in blocks: only when the verbatim window overflows (more than recent_messages, or
+    more than the token budget) is it cut back to its newest recent_messages - summarize_batch
+    messages and half the budget, in a single summarize call. The window then refills for
+    several turns before the summarizer runs again.
+    """
+
+    summary_prefix = "Summary of earlier conversation: "
+
+    def __init__(self, max_tokens: int = 1500, recent_messages: int = 12, summarize_batch: int = 8,
+                 summary_tokens: int = 300):
+        self.max_tokens = max_tokens
+        self.recent_messages = recent_messages
+        self.summarize_batch = summarize_batch
+        self.summary_tokens = summary_tokens
+        self.summary = ""
+        self.summarized_count = 0
+
+    @staticmethod
+    def count_tokens(text: str) -> int:
+        """Estimate the token count of a text, counting CJK characters one token each"""
+        return estimate_tokens(text)
+
+    @staticmethod
+    def truncate(text: str, max_tokens: int) -> str:
+        """Cut a text down to at most max_tokens tokens"""
+        if estimate_tokens(text) <= max_tokens:
+            return text
+        keep = len(text)
+        while keep > 0 and estimate_tokens(text[:keep] + "...") > max_tokens:
+            # Shrink in proportion to the overshoot; CJK and Latin text cost different amounts per character
+            keep = keep * max_tokens // estimate_tokens(text[:keep] + "...")
+        return text[:keep] + "..."
+
+    def window_budget(self) -> int:
+        """Tokens left for verbatim messages once the summary is accounted for"""
+        return self.max_tokens - self.summary_tokens - self.count_tokens(self.summary_prefix)
+
+    def fit_count(self, lines: List[str], limit: int, budget: int) -> int:
+        """How many of the newest messages fit in limit messages and budget tokens (always at least one)"""
+        keep = 0
+        used = 0
+        for line in reversed(lines):
+            tokens = self.count_tokens(line + "\n")
+            if keep >= limit or (keep and used + tokens > budget):
+                break
+            keep += 1
+            used += tokens
+        return keep
+
+    def window(self, chat_history: List[Tuple[str, str]]) -> List[str]:
+        """The messages not folded into the summary yet, starting over if the chat was replaced"""
+        if len(chat_history) < self.summarized_count:
+            # The chat was replaced or truncated, start over
+            self.summary = ""
+            self.summarized_count = 0
+        return [f"{role}: {msg}" for role, msg in chat_history[self.summarized_count:]]
+
+    def format_history(self, chat_history: List[Tuple[str, str]]) -> str:
+        """Render the history for the prompt without calling the model"""
+        budget = self.window_budget()
+        lines = self.window(chat_history)
+        # Anything beyond the window is only waiting for the next fold: leave it out rather than overflow
+        lines = lines[len(lines) - self.fit_count(lines, self.recent_messages, budget):]
+
+        if len(lines) == 1:
+            # Always keep the latest message, even if it has to be cut
+            lines = [self.truncate(lines[0], budget - 1)]
+
+        parts = []
+        if self.summary:
+            parts.append(f"{self.summary_prefix}{self.summary}")
+        parts.extend(lines)
+        return "\n".join(parts)
+
+    def fold(self, chat_history: List[Tuple[str, str]], summarize: Callable[[str, str], str]) -> bool:
+        """Fold a block of old messages into the summary if the window overflows; returns whether it did"""
+        budget = self.window_budget()
+        lines = self.window(chat_history)
+        used = sum(self.count_tokens(line + "\n") for line in lines)
+        if len(lines) <= self.recent_messages and used <= budget:
+            return False
+
+        keep = self.fit_count(lines, max(self.recent_messages - self.summarize_batch, 1), budget // 2)
+        evicted = chat_history[self.summarized_count:len(chat_history) - keep]
+        if not evicted:
+            return False
+        evicted_text = "\n".join([f"{role}: {msg}" for role, msg in evicted])
+        try:
+            summary = summarize(self.summary, evicted_text)
+        except Exception as e:
+            logger.error(f"Error summarizing conversation: {str(e)}")
+            summary = f"{self.summary}\n{evicted_text}".strip()
+        self.summary = self.truncate(summary.strip(), self.summary_tokens)
+        self.summarized_count = len(chat_history) - keep
+        return True
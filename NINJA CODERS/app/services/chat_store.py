@@ -0,0 +1,146 @@
+import json
+import os
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from services.db import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+class ChatStore(SQLiteStore):
+    """SQLite (WAL mode) storage for chats, appending one message at a time"""
+
+    def __init__(self, db_path: str = "chat_history.db"):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.setup_database()
+
+    def setup_database(self) -> None:
+        """Create the tables and switch the database to WAL mode"""
+        with self.connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS chats (
+                    id TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    created_at TEXT NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS messages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    chat_id TEXT NOT NULL REFERENCES chats(id) ON DELETE CASCADE,
+                    role TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    created_at TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_chat ON messages (chat_id, id)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS settings (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            """)
+
+    def list_chats(self) -> Dict[str, str]:
+        """Return the chat index as {chat_id: name}, oldest first"""
+        with self.connect() as conn:
+            rows = conn.execute("SELECT id, name FROM chats ORDER BY rowid").fetchall()
+        return dict(rows)
+
+    def create_chat(self, chat_id: str, name: str) -> None:
+        """Add an empty chat to the index; raises sqlite3.IntegrityError if the id is taken"""
+        with self.lock, self.connect() as conn:
+            conn.execute(
+                "INSERT INTO chats (id, name, created_at) VALUES (?, ?, ?)",
+                (chat_id, name, datetime.now().isoformat())
+            )
+
+    def delete_chat(self, chat_id: str) -> None:
+        """Delete a chat and its messages"""
+        with self.lock, self.connect() as conn:
+            conn.execute("DELETE FROM messages WHERE chat_id = ?", (chat_id,))
+            conn.execute("DELETE FROM chats WHERE id = ?", (chat_id,))
+
+    def append_message(self, chat_id: str, role: str, content: str) -> None:
+        """Append a single message to a chat"""
+        with self.lock, self.connect() as conn:
+            conn.execute(
+                "INSERT INTO messages (chat_id, role, content, created_at) VALUES (?, ?, ?, ?)",
+                (chat_id, role, content, datetime.now().isoformat())
+            )
+
+    def load_messages(self, chat_id: str) -> List[Tuple[str, str]]:
+        """Load the messages of one chat in order"""
+        with self.connect() as conn:
+            rows = conn.execute(
+                "SELECT role, content FROM messages WHERE chat_id = ? ORDER BY id",
+                (chat_id,)
+            ).fetchall()
+        return [(role, content) for role, content in rows]
+
+    def count_messages(self, chat_id: str) -> int:
+        """Count the messages of one chat"""
+        with self.connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM messages WHERE chat_id = ?", (chat_id,)).fetchone()[0]
+
+    def get_setting(self, key: str) -> Optional[str]:
+        with self.connect() as conn:
+            row = conn.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_setting(self, key: str, value: Optional[str]) -> None:
+        with self.lock, self.connect() as conn:
+            conn.execute(
+                "INSERT INTO settings (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, value)
+            )
+
+    def import_json(self, json_path: str = "chat_history.json") -> bool:
+        """One-time migration of the legacy chat_history.json file.
+
+        The imported flag is checked and set in the same write transaction, under the store lock,
+        so sessions starting together cannot both import (and duplicate) the messages.
+        """
+        if not os.path.exists(json_path):
+            return False
+
+        with self.lock, self.connect() as conn:
+            # Take the write lock before looking at the flag; other processes wait here
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("SELECT value FROM settings WHERE key = 'json_imported'").fetchone():
+                return False
+            try:
+                with open(json_path, 'r') as f:
+                    data = json.load(f)
+            except FileNotFoundError:
+                return False
+            except Exception as e:
+                logger.error(f"Error reading {json_path} for migration: {str(e)}")
+                return False
+
+            now = datetime.now().isoformat()
+            for chat_id, chat_data in data.get('chats', {}).items():
+                conn.execute(
+                    "INSERT OR IGNORE INTO chats (id, name, created_at) VALUES (?, ?, ?)",
+                    (chat_id, chat_data.get('name', chat_id), now)
+                )
+                conn.executemany(
+                    "INSERT INTO messages (chat_id, role, content, created_at) VALUES (?, ?, ?, ?)",
+                    [(chat_id, role, content, now) for role, content in chat_data.get('messages', [])]
+                )
+            conn.execute(
+                "INSERT OR REPLACE INTO settings (key, value) VALUES ('current_chat_id', ?)",
+                (data.get('current_chat_id'),)
+            )
+            conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES ('json_imported', ?)", (now,))
+
+        try:
+            os.replace(json_path, json_path + ".migrated")
+        except FileNotFoundError:
+            pass
+        logger.info(f"Migrated {len(data.get('chats', {}))} chats from {json_path}")
+        return True
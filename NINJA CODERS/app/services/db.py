@@ -0,0 +1,18 @@
+import sqlite3
+from contextlib import contextmanager
+from typing import Iterator
+
+class SQLiteStore:
+    """Base for the persistent stores: each operation opens its own short-lived connection to db_path"""
+
+    db_path: str
+
+    @contextmanager
+    def connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a short-lived connection and commit on success"""
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
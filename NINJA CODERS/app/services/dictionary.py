@@ -0,0 +1,183 @@
+import os
+import re
+import sys
+import json
+import logging
+import argparse
+from typing import Callable, Dict, List, Optional, Tuple
+from services.dictionary_cache import DictionaryCache
+from services.resilience import CircuitOpenError, call_with_retry, get_breaker
+
+logger = logging.getLogger(__name__)
+
+# Keys every word-context result must contain before it is cached
+CONTEXT_KEYS = ["definition", "parts_of_speech", "etymology", "examples", "synonyms", "related_words"]
+
+def is_valid_context(context_result) -> bool:
+    """Check that a word-context result has every expected key"""
+    return isinstance(context_result, dict) and all(key in context_result for key in CONTEXT_KEYS)
+
+def build_batch_prompt(words: List[str], input_language: str, output_language: str) -> str:
+    """Build one prompt asking for the context of several words at once"""
+    word_list = "\n".join(f"- {word}" for word in words)
+    return f"""
+    Provide a comprehensive linguistic analysis of each of the following words in {input_language},
+    and return the explanations in {output_language}:
+    {word_list}
+
+    For each word include:
+    1. Definition
+    2. Parts of Speech
+    3. Etymology
+    4. 3-4 Example Sentences
+    5. Synonyms
+    6. Related Words or Nuanced Meanings
+
+    Return a single valid JSON object whose keys are the words exactly as listed above and whose values have these keys:
+    {{
+        "definition": "",
+        "parts_of_speech": "",
+        "etymology": "",
+        "examples": [],
+        "synonyms": [],
+        "related_words": []
+    }}
+    Provide only the JSON response without any additional text.
+    """
+
+def parse_batch_response(text: str, words: List[str]) -> Dict[str, Dict]:
+    """Extract the valid entries of a batch response, matched back to the requested words"""
+    json_match = re.search(r'\{.*\}', text, re.DOTALL)
+    if not json_match:
+        return {}
+    try:
+        data = json.loads(json_match.group(0))
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+
+    # The model may change the case or spacing of a word, so match on the normalized form
+    by_key = {DictionaryCache.normalize(key): value for key, value in data.items()}
+    results = {}
+    for word in words:
+        context_result = by_key.get(DictionaryCache.normalize(word))
+        if is_valid_context(context_result):
+            results[word] = context_result
+    return results
+
+def lookup_words(model, words: List[str], input_language: str, output_language: str,
+                 cache: Optional[DictionaryCache] = None, batch_size: int = 10, max_rounds: int = 3,
+                 progress: Optional[Callable[[int, int], None]] = None) -> Tuple[Dict[str, Dict], List[str]]:
+    """
+    Look up many words with a few batched Gemini requests.
+    Each word is validated on its own and only the failed words are requested again.
+    Returns the results and the words that still failed after max_rounds.
+    """
+    # Drop duplicates and blanks while keeping the teacher's order
+    unique_words = list(dict.fromkeys(word.strip() for word in words if word and word.strip()))
+    results = {}
+    pending = []
+    for word in unique_words:
+        cached_result = cache.get(word, input_language, output_language) if cache else None
+        if cached_result is not None:
+            results[word] = cached_result
+        else:
+            pending.append(word)
+    if progress:
+        progress(len(results), len(unique_words))
+
+    for round_number in range(max_rounds):
+        if not pending:
+            break
+        failed = []
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            prompt = build_batch_prompt(batch, input_language, output_language)
+            try:
+                response = call_with_retry(lambda: model.generate_content(prompt), breaker=get_breaker("gemini"))
+                batch_results = parse_batch_response(response.text, batch)
+            except CircuitOpenError:
+                # Leave the rest for a later run instead of hammering an unhealthy upstream
+                logger.error("Gemini is unavailable, stopping the batch lookup")
+                failed.extend(word for word in pending[start:] if word not in results)
+                return {word: results[word] for word in unique_words if word in results}, failed
+            except Exception as e:
+                logger.error(f"Error looking up batch {batch}: {str(e)}")
+                batch_results = {}
+
+            for word in batch:
+                if word in batch_results:
+                    results[word] = batch_results[word]
+                    if cache:
+                        cache.put(word, input_language, output_language, batch_results[word])
+                else:
+                    failed.append(word)
+            if progress:
+                progress(len(results), len(unique_words))
+
+        if failed:
+            logger.info(f"Round {round_number + 1}: {len(failed)} word(s) failed, retrying...")
+        pending = failed
+
+    return {word: results[word] for word in unique_words if word in results}, pending
+
+def read_word_list(text: str) -> List[str]:
+    """Read one word or phrase per line (commas and semicolons also separate words)"""
+    return [word.strip() for word in re.split(r'[\n,;]', text) if word.strip()]
+
+def export_results(results: Dict[str, Dict], input_language: str, output_language: str) -> str:
+    """Serialize batch results to an exportable JSON document"""
+    return json.dumps({
+        "input_language": input_language,
+        "output_language": output_language,
+        "words": results
+    }, ensure_ascii=False, indent=2)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point: python -m services.dictionary words.txt -i English -o French"""
+    from dotenv import load_dotenv
+    from services.llm import MODEL_LADDER, get_generative_model
+
+    parser = argparse.ArgumentParser(description="Look up a vocabulary list and prewarm the dictionary cache")
+    parser.add_argument("word_file", help="Text file with one word per line")
+    parser.add_argument("-i", "--input-language", default="English")
+    parser.add_argument("-o", "--output-language", default="English")
+    parser.add_argument("--output", help="Where to write the JSON export (default: stdout)")
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--db-path", default="dictionary_cache.db")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    load_dotenv()
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        logger.error("GOOGLE_API_KEY not found in environment variables")
+        return 1
+
+    with open(args.word_file, encoding="utf-8") as f:
+        words = read_word_list(f.read())
+
+    results, failed = lookup_words(
+        get_generative_model(api_key, MODEL_LADDER[0]),
+        words,
+        args.input_language,
+        args.output_language,
+        cache=DictionaryCache(args.db_path),
+        batch_size=args.batch_size,
+        progress=lambda done, total: logger.info(f"{done}/{total} words ready")
+    )
+
+    document = export_results(results, args.input_language, args.output_language)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(document)
+    else:
+        print(document)
+
+    if failed:
+        logger.warning(f"Failed words: {', '.join(failed)}")
+    return 0 if not failed else 2
+
+if __name__ == "__main__":
+    sys.exit(main())
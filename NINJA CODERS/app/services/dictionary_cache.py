@@ -0,0 +1,88 @@
+import json
+import time
+import logging
+import threading
+import unicodedata
+from typing import Dict, Optional
+from services.db import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+class DictionaryCache(SQLiteStore):
+    """On-disk LRU cache with TTL for word-context results"""
+
+    def __init__(self, db_path: str = "dictionary_cache.db", max_entries: int = 5000,
+                 ttl_seconds: int = 30 * 24 * 3600):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.setup_database()
+
+    def setup_database(self) -> None:
+        with self.connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS word_context (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_word_context_access ON word_context (last_access)")
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Unicode-normalize, case-fold and collapse whitespace"""
+        text = unicodedata.normalize("NFKC", text)
+        return " ".join(text.split()).casefold()
+
+    def make_key(self, word: str, input_language: str, output_language: str) -> str:
+        return "\x1f".join([
+            self.normalize(word),
+            self.normalize(input_language),
+            self.normalize(output_language)
+        ])
+
+    def get(self, word: str, input_language: str, output_language: str) -> Optional[Dict]:
+        """Return the cached result, or None on a miss or an expired entry"""
+        key = self.make_key(word, input_language, output_language)
+        now = time.time()
+        with self.lock, self.connect() as conn:
+            row = conn.execute("SELECT value, created_at FROM word_context WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                if row is not None:
+                    conn.execute("DELETE FROM word_context WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            conn.execute("UPDATE word_context SET last_access = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, word: str, input_language: str, output_language: str, value: Dict) -> None:
+        """Store a validated result and evict the least recently used entries above max_entries"""
+        key = self.make_key(word, input_language, output_language)
+        now = time.time()
+        with self.lock, self.connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO word_context (key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now, now)
+            )
+            excess = conn.execute("SELECT COUNT(*) FROM word_context").fetchone()[0] - self.max_entries
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM word_context WHERE key IN "
+                    "(SELECT key FROM word_context ORDER BY last_access LIMIT ?)",
+                    (excess,)
+                )
+                self.evictions += excess
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters since the process started"""
+        with self.connect() as conn:
+            size = conn.execute("SELECT COUNT(*) FROM word_context").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "entries": size}
@@ -0,0 +1,28 @@
+import logging
+from io import BytesIO
+
+logger = logging.getLogger(__name__)
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # PDF uploads are disabled without pypdf
+    PdfReader = None
+
+SUPPORTED_TYPES = ["txt", "pdf"] if PdfReader else ["txt"]
+
+def extract_text(file_name: str, data: bytes) -> str:
+    """Plain text of an uploaded .txt or .pdf document, pages separated by blank lines"""
+    if file_name.lower().endswith(".pdf"):
+        if PdfReader is None:
+            raise ValueError("PDF support needs the pypdf package (pip install pypdf)")
+        reader = PdfReader(BytesIO(data))
+        pages = [(page.extract_text() or "").strip() for page in reader.pages]
+        logger.info(f"Extracted {len(pages)} pages from {file_name}")
+        return "\n\n".join(page for page in pages if page)
+
+    for encoding in ("utf-8-sig", "cp1252"):
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return data.decode("utf-8", errors="replace")
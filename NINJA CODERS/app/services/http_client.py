@@ -0,0 +1,71 @@
+import time
+import logging
+import threading
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+class PooledHTTPClient:
+    """Keep-alive HTTP client with timeouts, a concurrency cap per host and retries for models still loading.
+
+    The Hugging Face inference API answers 503 with {"estimated_time": seconds} while a model is
+    being loaded; those responses are retried after the hinted delay, within max_loading_wait.
+    """
+
+    def __init__(self, pool_size: int = 16, per_host: int = 4, connect_timeout: float = 3.05,
+                 read_timeout: float = 30.0, max_loading_retries: int = 3, max_loading_wait: float = 60.0):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.per_host = per_host
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_loading_retries = max_loading_retries
+        self.max_loading_wait = max_loading_wait
+        self.lock = threading.Lock()
+        self.host_slots: Dict[str, threading.BoundedSemaphore] = {}
+
+    def slots_for(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc
+        with self.lock:
+            if host not in self.host_slots:
+                self.host_slots[host] = threading.BoundedSemaphore(self.per_host)
+            return self.host_slots[host]
+
+    @staticmethod
+    def loading_delay(response: requests.Response) -> Optional[float]:
+        """Seconds the API suggests waiting for a model to load, if this is such a response"""
+        if response.status_code != 503:
+            return None
+        try:
+            estimated = response.json().get("estimated_time")
+        except (ValueError, AttributeError):
+            return None
+        return float(estimated) if isinstance(estimated, (int, float)) else None
+
+    def post(self, url: str, json: Any = None, headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        """POST with pooled connections; raises requests.Timeout / ConnectionError instead of hanging"""
+        slots = self.slots_for(url)
+        waited = 0.0
+        for attempt in range(self.max_loading_retries + 1):
+            with slots:
+                response = self.session.post(url, json=json, headers=headers, timeout=self.timeout)
+
+            delay = self.loading_delay(response)
+            if delay is None or attempt == self.max_loading_retries or waited >= self.max_loading_wait:
+                return response
+            # Sleep outside the host slot so other requests are not held up by a loading model
+            delay = min(max(delay, 1.0), self.max_loading_wait - waited)
+            logger.info(f"{urlparse(url).path} is loading, retrying in {delay:.1f}s")
+            time.sleep(delay)
+            waited += delay
+        return response
+
+@st.cache_resource(show_spinner=False)
+def get_http_client() -> PooledHTTPClient:
+    """Process-wide HTTP client, so every session reuses the same warm connections"""
+    return PooledHTTPClient()
@@ -0,0 +1,164 @@
+import os
+import time
+import bisect
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, TypeVar
+import streamlit as st
+import google.generativeai as genai
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+@st.cache_resource(show_spinner=False)
+def get_generative_model(api_key: str, model_name: str = "gemini-pro") -> genai.GenerativeModel:
+    """Process-wide Gemini model client, shared by every rerun and session"""
+    genai.configure(api_key=api_key)
+    logger.info(f"Created GenerativeModel client for {model_name}")
+    return genai.GenerativeModel(model_name)
+
+@st.cache_resource(show_spinner=False)
+def get_chat_model(api_key: str, model_name: str = "gemini-pro", temperature: float = 0.7):
+    """Process-wide LangChain chat client, shared by every rerun and session"""
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    logger.info(f"Created ChatGoogleGenerativeAI client for {model_name}")
+    return ChatGoogleGenerativeAI(
+        model=model_name,
+        google_api_key=api_key,
+        temperature=temperature
+    )
+
+# Model ladder: the first model is the primary, the rest are faster fallbacks used for hedging and failover
+MODEL_LADDER = [
+    name.strip() for name in os.getenv("GEMINI_MODELS", "gemini-pro,gemini-1.5-flash").split(",") if name.strip()
+]
+
+class LatencyHistogram:
+    """Bucketed latency histogram for one model"""
+
+    bounds = [0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 4.0, 6.0, 8.0, 12.0, 16.0, 24.0, 32.0, float("inf")]
+
+    def __init__(self):
+        self.counts = [0] * len(self.bounds)
+        self.total = 0
+
+    def record(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.total += 1
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Upper bound of the bucket holding the given percentile, None without samples"""
+        if not self.total:
+            return None
+        rank = fraction * self.total
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.bounds[-1]
+
+class ModelRouter:
+    """
+    Sends a request to the primary model and, when it runs past that model's p95 latency,
+    hedges with the next model on the ladder. The first answer that passes validation wins;
+    a failed answer moves straight to the next model. A call gives up after timeout seconds.
+    """
+
+    def __init__(self, name: str, models: List[str], hedge_percentile: float = 0.95,
+                 min_samples: int = 20, default_hedge_after: float = 4.0, timeout: float = 30.0):
+        self.name = name
+        self.models = models
+        self.hedge_percentile = hedge_percentile
+        self.min_samples = min_samples
+        self.default_hedge_after = default_hedge_after
+        self.timeout = timeout
+        self.histograms = {model: LatencyHistogram() for model in models}
+        self.lock = threading.Lock()
+        self.hedged = 0
+        self.wins = {model: 0 for model in models}
+        self.executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix=f"router-{name}")
+
+    def hedge_delay(self, model: str) -> float:
+        """Seconds to wait on a model before hedging: its p95 once there are enough samples"""
+        with self.lock:
+            histogram = self.histograms[model]
+            if histogram.total < self.min_samples:
+                return self.default_hedge_after
+            return histogram.percentile(self.hedge_percentile)
+
+    def timed(self, model: str, request: Callable[[str], T]) -> T:
+        start_time = time.perf_counter()
+        result = request(model)
+        with self.lock:
+            self.histograms[model].record(time.perf_counter() - start_time)
+        return result
+
+    def call(self, request: Callable[[str], T]) -> T:
+        """
+        Run request(model_name) along the ladder. request should raise if the answer is invalid,
+        so that only validated answers can win the race. Raises TimeoutError when no model
+        has answered within the router's timeout; requests still running are abandoned.
+        """
+        start_time = time.monotonic()
+        ladder = list(self.models)
+        pending = {}
+        last_error = None
+
+        def launch():
+            model = ladder.pop(0)
+            pending[self.executor.submit(self.timed, model, request)] = model
+            return model
+
+        latest = launch()
+        while pending:
+            remaining = self.timeout - (time.monotonic() - start_time)
+            if remaining <= 0:
+                raise TimeoutError(f"[{self.name}] no answer within {self.timeout:.0f}s")
+            timeout = min(self.hedge_delay(latest), remaining) if ladder else remaining
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                if timeout == remaining:
+                    continue
+                with self.lock:
+                    self.hedged += 1
+                slow_model = latest
+                latest = launch()
+                logger.info(f"[{self.name}] {slow_model} is slow, hedging with {latest}")
+                continue
+
+            for future in done:
+                model = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    last_error = e
+                    logger.warning(f"[{self.name}] {model} failed: {str(e)}")
+                    if ladder and not pending:
+                        latest = launch()
+                    continue
+                with self.lock:
+                    self.wins[model] += 1
+                return result
+
+        raise last_error
+
+    def stats(self) -> Dict[str, Dict]:
+        with self.lock:
+            return {
+                model: {
+                    "samples": self.histograms[model].total,
+                    "p50": self.histograms[model].percentile(0.5),
+                    "p95": self.histograms[model].percentile(0.95),
+                    "wins": self.wins[model]
+                }
+                for model in self.models
+            }
+
+@st.cache_resource(show_spinner=False)
+def get_model_router(name: str) -> ModelRouter:
+    """Process-wide router per use case, so each keeps its own latency histograms"""
+    return ModelRouter(name, MODEL_LADDER)
@@ -0,0 +1,126 @@
+import math
+from typing import Iterator, List, NamedTuple, Optional, Sequence
+
+# Bitrates (kbps) for Layer III, indexed by the header's 4-bit bitrate field
+BITRATES = {
+    1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 0],
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160, 0]
+}
+SAMPLE_RATES = {
+    1: [44100, 48000, 32000],
+    2: [22050, 24000, 16000],
+    2.5: [11025, 12000, 8000]
+}
+VERSIONS = {0b11: 1, 0b10: 2, 0b00: 2.5}
+
+class FrameHeader(NamedTuple):
+    version: float
+    bitrate: int
+    sample_rate: int
+    padding: int
+    length: int
+    samples: int
+
+def parse_header(data: bytes, offset: int) -> Optional[FrameHeader]:
+    """Decode the 4-byte MPEG audio Layer III frame header at an offset, or None if there is none"""
+    if offset + 4 > len(data) or data[offset] != 0xFF or (data[offset + 1] & 0xE0) != 0xE0:
+        return None
+    version = VERSIONS.get((data[offset + 1] >> 3) & 0b11)
+    layer = (data[offset + 1] >> 1) & 0b11
+    bitrate_index = data[offset + 2] >> 4
+    rate_index = (data[offset + 2] >> 2) & 0b11
+    if version is None or layer != 0b01 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    bitrate = BITRATES[1 if version == 1 else 2][bitrate_index] * 1000
+    sample_rate = SAMPLE_RATES[version][rate_index]
+    padding = (data[offset + 2] >> 1) & 1
+    samples = 1152 if version == 1 else 576
+    length = (samples // 8) * bitrate // sample_rate + padding
+    return FrameHeader(version, bitrate, sample_rate, padding, length, samples)
+
+def strip_tags(data: bytes) -> bytes:
+    """Drop a leading ID3v2 tag and a trailing ID3v1 tag"""
+    if data[:3] == b"ID3" and len(data) >= 10:
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        footer = 10 if data[5] & 0x10 else 0
+        data = data[10 + size + footer:]
+    if len(data) >= 128 and data[-128:-125] == b"TAG":
+        data = data[:-128]
+    return data
+
+def iter_frames(data: bytes) -> Iterator[bytes]:
+    """Yield the complete audio frames of an MP3 stream, skipping tags and junk between frames"""
+    data = strip_tags(data)
+    offset = 0
+    while offset < len(data):
+        header = parse_header(data, offset)
+        if header is None or offset + header.length > len(data):
+            offset += 1
+            continue
+        yield data[offset:offset + header.length]
+        offset += header.length
+
+def is_info_frame(frame: bytes) -> bool:
+    """Whether a frame is a Xing/Info or VBRI header rather than audio.
+
+    Encoders put one at the start of a stream with its frame count and seek table; the tag
+    follows the side info, whose length depends on the MPEG version and channel mode.
+    """
+    header = parse_header(frame, 0)
+    if header is None:
+        return False
+    mono = (frame[3] >> 6) == 0b11
+    if header.version == 1:
+        side_info = 17 if mono else 32
+    else:
+        side_info = 9 if mono else 17
+    offset = 4 + (0 if frame[1] & 0x01 else 2) + side_info
+    return frame[offset:offset + 4] in (b"Xing", b"Info") or frame[36:40] == b"VBRI"
+
+def duration(data: bytes) -> float:
+    """Playing time of an MP3 stream in seconds"""
+    seconds = 0.0
+    for frame in iter_frames(data):
+        if not is_info_frame(frame):
+            header = parse_header(frame, 0)
+            seconds += header.samples / header.sample_rate
+    return seconds
+
+def silent_frame(frame: bytes) -> bytes:
+    """A frame with the same header as the given one, no CRC and all-zero side info and main data.
+
+    Zero side info means no bits are allocated to any granule, which decoders play as silence;
+    main_data_begin = 0 also keeps it from borrowing the previous frame's bit reservoir.
+    """
+    header = bytearray(frame[:4])
+    header[1] |= 0x01  # protection bit set: no CRC follows the header
+    return bytes(header) + bytes(len(frame) - 4)
+
+def silence(template: bytes, duration_ms: int) -> bytes:
+    """Silent frames matching a clip's format, long enough to cover the duration"""
+    header = parse_header(template, 0)
+    if header is None or duration_ms <= 0:
+        return b""
+    count = math.ceil(duration_ms / 1000 * header.sample_rate / header.samples)
+    return silent_frame(template) * count
+
+def join_clips(clips: Sequence[bytes], gaps_ms: Optional[Sequence[int]] = None) -> bytes:
+    """Concatenate MP3 clips frame by frame with optional silences between them, without re-encoding.
+
+    gaps_ms[i] is the pause after clips[i]; the clips must share a sample rate and channel mode,
+    which holds for clips produced by the same engine and language. Xing/Info header frames
+    are dropped: their frame counts would describe a single clip, not the joined stream.
+    """
+    parts: List[bytes] = []
+    template = None
+    for i, clip in enumerate(clips):
+        frames = [frame for frame in iter_frames(clip) if not is_info_frame(frame)]
+        if not frames:
+            continue
+        if template is None:
+            template = frames[0]
+        parts.extend(frames)
+        if gaps_ms and i < len(clips) - 1:
+            parts.append(silence(template, gaps_ms[i]))
+    return b"".join(parts)
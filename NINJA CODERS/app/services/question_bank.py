@@ -0,0 +1,172 @@
+import sys
+import json
+import random
+import logging
+import argparse
+import threading
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from services.db import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+class QuestionBank(SQLiteStore):
+    """Persistent SQLite bank of validated quiz questions"""
+
+    def __init__(self, db_path: str = "question_bank.db"):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.setup_database()
+
+    def setup_database(self) -> None:
+        with self.connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS questions (
+                    hash TEXT PRIMARY KEY,
+                    user_language TEXT NOT NULL,
+                    target_language TEXT NOT NULL,
+                    category TEXT NOT NULL,
+                    difficulty TEXT NOT NULL,
+                    topic TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    created_at TEXT NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_questions_lookup
+                ON questions (user_language, target_language, category, difficulty, topic)
+            """)
+
+    def add(self, question_hash: str, question: Dict, user_language: str, target_language: str,
+            category: str) -> bool:
+        """Store a validated question; returns False if it was already in the bank"""
+        with self.lock, self.connect() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO questions "
+                "(hash, user_language, target_language, category, difficulty, topic, payload, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    question_hash, user_language, target_language, category,
+                    str(question.get("difficulty", "")).lower(), str(question.get("topic", "")),
+                    json.dumps(question, ensure_ascii=False), datetime.now().isoformat()
+                )
+            )
+            return cursor.rowcount > 0
+
+    def hashes(self, user_language: str, target_language: str, category: str) -> Set[str]:
+        """Hashes of every banked question for a language pair and category"""
+        with self.connect() as conn:
+            rows = conn.execute(
+                "SELECT hash FROM questions WHERE user_language = ? AND target_language = ? AND category = ?",
+                (user_language, target_language, category)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def draw(self, user_language: str, target_language: str, category: str, difficulties: List[str],
+             exclude: Set[str]) -> Tuple[List[Tuple[str, Dict]], List[str]]:
+        """
+        Pick one unseen question per requested difficulty.
+        Returns the (hash, question) pairs drawn and the difficulties the bank could not serve.
+        """
+        wanted = {}
+        for difficulty in difficulties:
+            wanted[difficulty] = wanted.get(difficulty, 0) + 1
+
+        drawn = {}
+        with self.connect() as conn:
+            for difficulty, count in wanted.items():
+                rows = conn.execute(
+                    "SELECT hash, payload FROM questions "
+                    "WHERE user_language = ? AND target_language = ? AND category = ? AND difficulty = ?",
+                    (user_language, target_language, category, difficulty)
+                ).fetchall()
+                unseen = [row for row in rows if row[0] not in exclude]
+                drawn[difficulty] = random.sample(unseen, min(count, len(unseen)))
+
+        questions = []
+        missing = []
+        for difficulty in difficulties:
+            if drawn[difficulty]:
+                question_hash, payload = drawn[difficulty].pop()
+                questions.append((question_hash, json.loads(payload)))
+            else:
+                missing.append(difficulty)
+        return questions, missing
+
+    def all_questions(self) -> Iterator[Tuple[str, Dict]]:
+        """Every banked question as (hash, question)"""
+        with self.connect() as conn:
+            for question_hash, payload in conn.execute("SELECT hash, payload FROM questions"):
+                yield question_hash, json.loads(payload)
+
+    def build_near_duplicate_index(self, threshold: float):
+        """Index the whole bank for near-duplicate checks"""
+        from services.quiz_generator import GeminiQuiz
+        from services.similarity import NearDuplicateIndex
+
+        index = NearDuplicateIndex(threshold=threshold)
+        for question_hash, question in self.all_questions():
+            index.add(question_hash, GeminiQuiz.similarity_text(question))
+        logger.info(f"Indexed {len(index.signatures)} banked questions for near-duplicate checks")
+        return index
+
+    def count(self, user_language: str, target_language: str, category: str) -> int:
+        with self.connect() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM questions WHERE user_language = ? AND target_language = ? AND category = ?",
+                (user_language, target_language, category)
+            ).fetchone()[0]
+
+def fill_bank(bank: QuestionBank, quiz, user_language: str, target_language: str, category: str,
+              count: int, batch_size: int = 10) -> int:
+    """Offline job: generate validated questions in batches and add them to the bank"""
+    question_history = bank.hashes(user_language, target_language, category)
+    levels = ["beginner", "intermediate", "advanced"]
+    added = 0
+    # Give up after three times the rounds a perfect run would need
+    max_rounds = 3 * -(-count // batch_size)
+    for _ in range(max_rounds):
+        if added >= count:
+            break
+        size = min(batch_size, count - added)
+        difficulties = [levels[(added + i) % len(levels)] for i in range(size)]
+        questions, _ = quiz.generate_questions_batch(
+            user_language, target_language, category, difficulties, question_history
+        )
+        for question in questions:
+            if bank.add(quiz.calculate_question_hash(question), question, user_language, target_language, category):
+                added += 1
+        logger.info(f"{added}/{count} questions added to the bank")
+    return added
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point: python -m services.question_bank English French Grammar --count 50"""
+    from services.quiz_generator import GeminiQuiz
+
+    parser = argparse.ArgumentParser(description="Fill the quiz question bank offline")
+    parser.add_argument("user_language")
+    parser.add_argument("target_language")
+    parser.add_argument("category", choices=["Grammar", "Vocabulary", "Common Phrases"])
+    parser.add_argument("--count", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--db-path", default="question_bank.db")
+    parser.add_argument("--similarity-threshold", type=float, default=0.6,
+                        help="Reject questions at least this similar to a banked one")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    bank = QuestionBank(args.db_path)
+    quiz = GeminiQuiz()
+    quiz.near_duplicate_index = bank.build_near_duplicate_index(args.similarity_threshold)
+    added = fill_bank(
+        bank, quiz, args.user_language, args.target_language, args.category,
+        args.count, args.batch_size
+    )
+    total = bank.count(args.user_language, args.target_language, args.category)
+    logger.info(f"Added {added} questions, {total} in the bank for this language pair and category")
+    logger.info(f"Near-duplicate checks: {quiz.near_duplicate_index.stats()}")
+    return 0 if added else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,368 @@
+from dotenv import load_dotenv
+import streamlit as st
+import os
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import logging
+import json
+import random
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from services.llm import MODEL_LADDER, get_generative_model, get_model_router
+from services.resilience import call_with_retry, get_breaker
+
+logger = logging.getLogger(__name__)
+
+class GeminiQuiz:
+    def __init__(self):
+        load_dotenv()
+        # self.api_key = os.getenv("GOOGLE_API_KEY")
+        try:
+            self.api_key = os.getenv("GOOGLE_API_KEY") or st.secrets["GOOGLE_API_KEY"]
+        except KeyError:
+            st.error("Google API Key is not set. Please provide it as an environment variable or in Streamlit secrets.")
+
+
+
+        if not self.api_key:
+            raise ValueError("GOOGLE_API_KEY not found in environment variables")
+        
+        self.setup_genai()
+        self.max_retries = 5
+        # Guards the uniqueness check when questions are generated on worker threads
+        self.history_lock = threading.Lock()
+        # Optional NearDuplicateIndex shared with the question bank; catches rephrased duplicates
+        self.near_duplicate_index = None
+        self.exact_duplicates = 0
+            
+    def setup_genai(self) -> None:
+        try:
+            self.model = get_generative_model(self.api_key, MODEL_LADDER[0])
+            # Hedges slow requests and fails over along the model ladder
+            self.router = get_model_router("quiz")
+        except Exception as e:
+            logger.error(f"Error setting up Gemini: {str(e)}")
+            raise
+
+    def get_balanced_difficulty(self) -> str:
+        """Ensure a balanced distribution of difficulty levels"""
+        difficulties = ["beginner", "intermediate", "advanced"]
+        
+        if len(st.session_state.used_difficulties) >= 10:  # Reset after 10 questions
+            st.session_state.used_difficulties = []
+            
+        # Count current difficulty distribution
+        difficulty_counts = {diff: st.session_state.used_difficulties.count(diff) for diff in difficulties}
+        
+        # Filter out overused difficulties (more than 1/3 of total questions)
+        available_difficulties = [
+            diff for diff in difficulties 
+            if difficulty_counts[diff] < (len(st.session_state.used_difficulties) + 1) / 3
+        ]
+        
+        # If all difficulties are equally distributed, allow any
+        if not available_difficulties:
+            available_difficulties = difficulties
+            
+        selected_difficulty = random.choice(available_difficulties)
+        st.session_state.used_difficulties.append(selected_difficulty)
+        return selected_difficulty
+
+    def get_language_prompt(self, user_language: str, target_language: str, category: str,
+                            difficulty: Optional[str] = None) -> str:
+        """Generate appropriate prompt based on languages and category"""
+        difficulty_levels = {
+            "beginner": "basic vocabulary and simple structures",
+            "intermediate": "moderate complexity and common usage patterns",
+            "advanced": "complex language features and nuanced usage"
+        }
+        
+        base_difficulty = difficulty or self.get_balanced_difficulty()
+        
+        # Add specific constraints to ensure uniqueness
+        base_constraints = f"""
+            Constraints for generating unique questions:
+            - Use diverse question formats (fill-in-blank, scenario-based, translation, etc.)
+            - Include practical, real-world contexts
+            - Vary the topics within the category
+            - Ensure cultural relevance to {target_language}-speaking regions
+            - Don't repeat common textbook examples
+        """
+        
+        prompts = {
+            "Grammar": f"""
+                Generate a {base_difficulty}-level multiple-choice question for language learning.
+                Context: Question about {target_language} grammar, written in {user_language}.
+                Focus Area: {difficulty_levels[base_difficulty]}
+                {base_constraints}
+                Additional Grammar-specific requirements:
+                - Include varied sentence structures
+                - Focus on practical usage rather than technical terms
+                - Incorporate common language patterns
+                
+                Return strictly in this JSON format:
+                {{
+                    "question": "Clear, well-formulated question",
+                    "options": ["Option 1", "Option 2", "Option 3", "Option 4"],
+                    "correct_answer": "The correct option exactly as written in options",
+                    "explanation": "Detailed explanation of why the answer is correct",
+                    "difficulty": "{base_difficulty}",
+                    "topic": "Specific grammar topic covered"
+                }}
+            """,
+            "Vocabulary": f"""
+                Generate a {base_difficulty}-level vocabulary question for language learning.
+                Context: Question about {target_language} vocabulary, written in {user_language}.
+                Focus Area: {difficulty_levels[base_difficulty]}
+                {base_constraints}
+                Additional Vocabulary-specific requirements:
+                - Use words in context-rich situations
+                - Include collocations and common word pairs
+                - Focus on frequency-based vocabulary selection
+                
+                Return strictly in this JSON format:
+                {{
+                    "question": "Clear, well-formulated question",
+                    "options": ["Option 1", "Option 2", "Option 3", "Option 4"],
+                    "correct_answer": "The correct option exactly as written in options",
+                    "explanation": "Detailed explanation including usage examples",
+                    "difficulty": "{base_difficulty}",
+                    "topic": "Specific vocabulary theme"
+                }}
+            """,
+            "Common Phrases": f"""
+                Generate a {base_difficulty}-level question about common phrases.
+                Context: Question about {target_language} expressions, written in {user_language}.
+                Focus Area: {difficulty_levels[base_difficulty]}
+                {base_constraints}
+                Additional Phrase-specific requirements:
+                - Include contemporary expressions
+                - Focus on situational appropriateness
+                - Cover various social contexts
+                
+                Return strictly in this JSON format:
+                {{
+                    "question": "Clear, well-formulated question",
+                    "options": ["Option 1", "Option 2", "Option 3", "Option 4"],
+                    "correct_answer": "The correct option exactly as written in options",
+                    "explanation": "Detailed explanation with cultural context",
+                    "difficulty": "{base_difficulty}",
+                    "topic": "Specific phrase category or situation"
+                }}
+            """
+        }
+        
+        return prompts[category] + "\nProvide only the JSON response without any additional text."
+
+    def calculate_question_hash(self, question_data: Dict) -> str:
+        """Calculate a unique hash for a question based on its content"""
+        # Create a string combining multiple aspects of the question
+        question_string = (
+            f"{question_data['question'].lower()}"
+            f"{','.join(sorted(opt.lower() for opt in question_data['options']))}"
+            f"{question_data['correct_answer'].lower()}"
+            f"{question_data.get('topic', '').lower()}"
+        )
+        return hashlib.md5(question_string.encode()).hexdigest()
+
+    def is_question_unique(self, question_data: Dict, question_history: Optional[Set[str]] = None) -> bool:
+        """Check if a question is unique based on its content"""
+        if question_history is None:
+            question_history = st.session_state.question_history
+        question_hash = self.calculate_question_hash(question_data)
+        with self.history_lock:
+            if question_hash in question_history:
+                self.exact_duplicates += 1
+                return False
+
+        if self.near_duplicate_index is not None:
+            match = self.near_duplicate_index.check_and_add(question_hash, self.similarity_text(question_data))
+            if match:
+                logger.info(f"Near-duplicate of question {match[0]} (similarity {match[1]:.2f})")
+                return False
+
+        with self.history_lock:
+            if question_hash in question_history:
+                self.exact_duplicates += 1
+                return False
+            question_history.add(question_hash)
+        return True
+
+    @staticmethod
+    def similarity_text(question_data: Dict) -> str:
+        """Text compared by the near-duplicate index: question, options and answer"""
+        return " ".join([
+            str(question_data.get('question', '')),
+            " ".join(sorted(str(opt) for opt in question_data.get('options', []))),
+            str(question_data.get('correct_answer', ''))
+        ])
+
+    def parse_response(self, response_text: str):
+        """Clean a model response and parse the JSON it contains"""
+        response_text = response_text.strip()
+        if "```json" in response_text:
+            response_text = response_text.split("```json")[1].split("```")[0]
+        elif "```" in response_text:
+            response_text = response_text.split("```")[1]
+        
+        response_text = (
+            response_text.strip()
+            .replace('\n', '')
+            .replace('\r', '')
+            .replace('\t', '')
+        )
+        
+        return json.loads(response_text)
+
+    def validate_question(self, question_data) -> bool:
+        """Validate the format of a generated question"""
+        required_fields = ["question", "options", "correct_answer", "explanation", "difficulty"]
+        if not isinstance(question_data, dict) or not all(field in question_data for field in required_fields):
+            logger.warning("Missing required fields")
+            return False
+        
+        if not isinstance(question_data["options"], list) or len(question_data["options"]) != 4:
+            logger.warning("Invalid options format")
+            return False
+        
+        if question_data["correct_answer"] not in question_data["options"]:
+            logger.warning("Correct answer not in options")
+            return False
+
+        return True
+
+    def generate_question(self, user_language: str, target_language: str, category: str,
+                          difficulty: Optional[str] = None, question_history: Optional[Set[str]] = None) -> Dict:
+        """
+        Generate one validated, unique question. Pass difficulty and question_history
+        explicitly when calling from a worker thread, where st.session_state is not available.
+        """
+        for attempt in range(self.max_retries):
+            try:
+                prompt = self.get_language_prompt(user_language, target_language, category, difficulty)
+
+                def request_question(model_name: str) -> Dict:
+                    # Validate inside the request so only a usable answer can win a hedged race
+                    response = get_generative_model(self.api_key, model_name).generate_content(prompt)
+                    question_data = self.parse_response(response.text)
+                    if not self.validate_question(question_data):
+                        raise ValueError("Invalid question format")
+                    return question_data
+
+                # Bad output is retried once, by the router on the next model; this loop only re-prompts duplicates
+                question_data = call_with_retry(
+                    lambda: self.router.call(request_question), breaker=get_breaker("gemini"), max_attempts=3,
+                    retry_parse=False
+                )
+                
+                if self.is_question_unique(question_data, question_history):
+                    return question_data
+                
+                logger.info(f"Duplicate question on attempt {attempt + 1}, retrying...")
+                
+            except Exception as e:
+                logger.error(f"Giving up on attempt {attempt + 1}: {str(e)}")
+                raise
+        
+        raise ValueError("Failed to generate a unique question after maximum retries")
+
+    def get_batch_prompt(self, user_language: str, target_language: str, category: str,
+                         difficulties: List[str]) -> str:
+        """Generate one prompt asking for several questions, one per requested difficulty"""
+        category_focus = {
+            "Grammar": f"{target_language} grammar: varied sentence structures, practical usage rather than technical terms, common language patterns",
+            "Vocabulary": f"{target_language} vocabulary: words in context-rich situations, collocations and common word pairs, frequency-based word selection",
+            "Common Phrases": f"{target_language} expressions: contemporary expressions, situational appropriateness, various social contexts"
+        }
+        difficulty_list = ", ".join(f"{i + 1}. {difficulty}" for i, difficulty in enumerate(difficulties))
+
+        return f"""
+            Generate {len(difficulties)} different multiple-choice questions for language learning.
+            Context: Questions about {category_focus[category]}, written in {user_language}.
+            Difficulty of each question, in order: {difficulty_list}
+            Constraints for generating unique questions:
+            - Every question must cover a different topic and use a different format (fill-in-blank, scenario-based, translation, etc.)
+            - Include practical, real-world contexts
+            - Ensure cultural relevance to {target_language}-speaking regions
+            - Don't repeat common textbook examples
+
+            Return strictly a JSON array of {len(difficulties)} objects in this format:
+            [
+                {{
+                    "question": "Clear, well-formulated question",
+                    "options": ["Option 1", "Option 2", "Option 3", "Option 4"],
+                    "correct_answer": "The correct option exactly as written in options",
+                    "explanation": "Detailed explanation of why the answer is correct",
+                    "difficulty": "beginner, intermediate or advanced",
+                    "topic": "Specific topic covered"
+                }}
+            ]
+            Provide only the JSON response without any additional text.
+        """
+
+    def generate_questions_batch(self, user_language: str, target_language: str, category: str,
+                                 difficulties: List[str], question_history: Set[str]) -> Tuple[List[Dict], List[str]]:
+        """
+        Generate several questions with a single request. Each element is validated on its own
+        and only the missing or invalid slots are requested again.
+        Returns the questions and the difficulties of the slots that could not be filled.
+        """
+        questions = []
+        missing = list(difficulties)
+        for attempt in range(self.max_retries):
+            if not missing:
+                break
+            prompt = self.get_batch_prompt(user_language, target_language, category, missing)
+
+            def request_batch(model_name: str):
+                response = get_generative_model(self.api_key, model_name).generate_content(prompt)
+                return self.parse_response(response.text)
+
+            try:
+                # Only the router retries bad output; unfilled slots fall back to single requests
+                items = call_with_retry(
+                    lambda: self.router.call(request_batch), breaker=get_breaker("gemini"), max_attempts=3,
+                    retry_parse=False
+                )
+                if isinstance(items, dict):
+                    items = [items]
+            except Exception as e:
+                logger.error(f"Error on batch attempt {attempt + 1}: {str(e)}")
+                break
+
+            for question_data in items:
+                if not missing:
+                    break
+                if not self.validate_question(question_data):
+                    continue
+                if not self.is_question_unique(question_data, question_history):
+                    logger.info("Duplicate question in batch, skipping...")
+                    continue
+                # Fill the slot of the matching difficulty, or the first open one
+                difficulty = question_data["difficulty"]
+                missing.remove(difficulty if difficulty in missing else missing[0])
+                questions.append(question_data)
+
+            if missing:
+                logger.info(f"Batch attempt {attempt + 1}: {len(missing)} slot(s) left to refill")
+
+        return questions, missing
+
+    def generate_concurrently(self, user_language: str, target_language: str, category: str,
+                              difficulties: List[str], question_history: Set[str],
+                              on_question: Callable[[Dict], None], max_workers: int = 5) -> None:
+        """Generate one question per difficulty concurrently on a bounded worker pool, passing each to on_question"""
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(
+                    self.generate_question,
+                    user_language, target_language, category, difficulty, question_history
+                )
+                for difficulty in difficulties
+            ]
+            for future in as_completed(futures):
+                try:
+                    on_question(future.result())
+                except Exception as e:
+                    logger.error(f"Error generating question: {str(e)}")
+                    continue
@@ -0,0 +1,199 @@
+import json
+import time
+import random
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Error classes used to pick a retry strategy
+PARSE_ERROR = "parse"
+RATE_LIMITED = "rate_limited"
+SERVER_ERROR = "server"
+AUTH_ERROR = "auth"
+OTHER_ERROR = "other"
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream that is currently failing"""
+
+class UpstreamBusyError(Exception):
+    """Raised when no upstream worker was free before the deadline; says nothing about upstream health"""
+
+def error_status(exc: Exception) -> Optional[int]:
+    """HTTP status carried by an exception, if any (google.api_core, requests, ...)"""
+    for candidate in (getattr(exc, "code", None), getattr(exc, "status_code", None),
+                      getattr(getattr(exc, "response", None), "status_code", None)):
+        if isinstance(candidate, int):
+            return candidate
+    return None
+
+def classify_error(exc: Exception) -> str:
+    """Sort an exception into parse / rate-limited / server / auth / other"""
+    status = error_status(exc)
+    name = type(exc).__name__
+    message = str(exc).lower()
+
+    if status == 429 or name in ("ResourceExhausted", "TooManyRequests") or "quota" in message:
+        return RATE_LIMITED
+    if status in (401, 403) or name in ("Unauthenticated", "PermissionDenied") or "api key" in message:
+        return AUTH_ERROR
+    if (status is not None and status >= 500) or name in (
+        "ServiceUnavailable", "InternalServerError", "DeadlineExceeded", "GatewayTimeout"
+    ) or isinstance(exc, (TimeoutError, ConnectionError)):
+        return SERVER_ERROR
+    if isinstance(exc, (json.JSONDecodeError, ValueError, KeyError, IndexError)):
+        return PARSE_ERROR
+    return OTHER_ERROR
+
+class CircuitBreaker:
+    """Fails fast after repeated upstream failures, then lets one trial call through after a cooldown"""
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self.lock:
+            return self.current_state()
+
+    def current_state(self) -> str:
+        """closed, open or half-open; the caller holds the lock"""
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now"""
+        with self.lock:
+            state = self.current_state()
+            if state == "closed":
+                return True
+            if state == "half-open" and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_unknown(self) -> None:
+        """An outcome that says nothing about upstream health: only frees the half-open trial slot"""
+        with self.lock:
+            self.trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self.lock:
+            self.failures += 1
+            if self.trial_in_flight or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self.trial_in_flight:
+                    logger.warning(f"Circuit '{self.name}' opened after {self.failures} failure(s)")
+                self.opened_at = time.monotonic()
+            self.trial_in_flight = False
+
+breakers: Dict[str, CircuitBreaker] = {}
+breakers_lock = threading.Lock()
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Process-wide circuit breaker for an upstream service"""
+    with breakers_lock:
+        if name not in breakers:
+            breakers[name] = CircuitBreaker(name)
+        return breakers[name]
+
+# Upstream calls run here so that the caller can stop waiting at the deadline;
+# a call that hangs keeps its worker until the client library gives up
+UPSTREAM_WORKERS = 32
+upstream_executor = ThreadPoolExecutor(max_workers=UPSTREAM_WORKERS, thread_name_prefix="upstream")
+
+def start_attempt(fn: Callable[[], T], queue_timeout: float) -> Tuple[Future, float]:
+    """Submit fn to the upstream pool and wait for a worker to pick it up; returns the future and its start time"""
+    started = threading.Event()
+    start_times = []
+
+    def run() -> T:
+        start_times.append(time.monotonic())
+        started.set()
+        return fn()
+
+    future = upstream_executor.submit(run)
+    if not started.wait(max(queue_timeout, 0)) and future.cancel():
+        raise UpstreamBusyError(f"All {UPSTREAM_WORKERS} upstream workers are busy")
+    started.wait()
+    return future, start_times[0]
+
+def call_with_retry(fn: Callable[[], T], breaker: Optional[CircuitBreaker] = None, max_attempts: int = 4,
+                    base_delay: float = 0.5, max_delay: float = 8.0, deadline: float = 30.0,
+                    retry_parse: bool = True) -> T:
+    """
+    Call fn, retrying according to the kind of error:
+    - parse failures are retried right away (the upstream is healthy, the output was not),
+      unless retry_parse is False because fn already retries bad output itself
+    - rate limits and server errors back off exponentially with full jitter
+      (rate limits start from a longer delay)
+    - auth and unknown errors are raised immediately
+    Retries stop at max_attempts or when the next wait would pass the total deadline; an attempt
+    still running at the deadline is abandoned and raises TimeoutError. The deadline starts when
+    the first attempt starts running: time spent queued for a free worker is local, and a call
+    that gets no worker within the deadline raises UpstreamBusyError without touching the breaker.
+    Upstream failures feed the circuit breaker, which raises CircuitOpenError while open.
+    """
+    start_time = None
+    for attempt in range(max_attempts):
+        if breaker is not None and not breaker.allow():
+            raise CircuitOpenError(f"{breaker.name} is temporarily unavailable")
+
+        try:
+            queue_timeout = deadline if start_time is None else deadline - (time.monotonic() - start_time)
+            future, attempt_start = start_attempt(fn, queue_timeout)
+            if start_time is None:
+                start_time = attempt_start
+            done, _ = wait([future], timeout=max(deadline - (time.monotonic() - start_time), 0))
+            if not done:
+                raise TimeoutError(f"No answer within the {deadline:.0f}s deadline")
+            result = future.result()
+        except Exception as e:
+            kind = classify_error(e)
+            if breaker is not None:
+                if kind in (RATE_LIMITED, SERVER_ERROR):
+                    breaker.record_failure()
+                elif kind == PARSE_ERROR:
+                    # The upstream answered, so it is healthy even if the answer was unusable
+                    breaker.record_success()
+                else:
+                    breaker.record_unknown()
+
+            if kind in (AUTH_ERROR, OTHER_ERROR) or attempt == max_attempts - 1:
+                raise
+            if kind == PARSE_ERROR and not retry_parse:
+                raise
+
+            if kind == PARSE_ERROR:
+                delay = 0.0
+            else:
+                backoff = base_delay * (4 if kind == RATE_LIMITED else 1) * (2 ** attempt)
+                delay = random.uniform(0, min(max_delay, backoff))
+            if time.monotonic() - start_time + delay > deadline:
+                raise
+
+            logger.warning(f"Attempt {attempt + 1} failed ({kind}: {str(e)}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+            continue
+
+        if breaker is not None:
+            breaker.record_success()
+        return result
@@ -0,0 +1,103 @@
+import re
+import random
+import hashlib
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+# Mersenne prime used for the MinHash permutations
+MERSENNE_PRIME = (1 << 61) - 1
+
+class NearDuplicateIndex:
+    """MinHash signatures over word shingles with LSH banding, for spotting rephrased questions"""
+
+    def __init__(self, threshold: float = 0.6, num_perm: int = 64, bands: int = 16, shingle_size: int = 2):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        # Fixed seed so signatures are comparable across processes
+        rng = random.Random(1337)
+        self.permutations = [
+            (rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME)) for _ in range(num_perm)
+        ]
+        self.buckets: List[Dict[Tuple[int, ...], Set[str]]] = [{} for _ in range(bands)]
+        self.signatures: Dict[str, Tuple[int, ...]] = {}
+        self.lock = threading.Lock()
+        self.checked = 0
+        self.near_duplicates = 0
+
+    def shingles(self, text: str) -> Set[str]:
+        """Lowercased word n-grams of a text"""
+        words = re.findall(r"\w+", text.lower())
+        if len(words) <= self.shingle_size:
+            return {" ".join(words)}
+        return {" ".join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)}
+
+    def signature(self, text: str) -> Tuple[int, ...]:
+        hashes = [
+            int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+            for shingle in self.shingles(text)
+        ]
+        return tuple(
+            min((a * h + b) % MERSENNE_PRIME for h in hashes)
+            for a, b in self.permutations
+        )
+
+    def estimate_similarity(self, first: Tuple[int, ...], second: Tuple[int, ...]) -> float:
+        """Estimated Jaccard similarity of two signatures"""
+        return sum(1 for x, y in zip(first, second) if x == y) / self.num_perm
+
+    def band_keys(self, signature: Tuple[int, ...]) -> List[Tuple[int, ...]]:
+        return [signature[band * self.rows:(band + 1) * self.rows] for band in range(self.bands)]
+
+    def find_similar(self, signature: Tuple[int, ...]) -> Optional[Tuple[str, float]]:
+        """Best indexed match at or above the threshold; only keys sharing an LSH band are compared"""
+        candidates = set()
+        for band, key in enumerate(self.band_keys(signature)):
+            candidates.update(self.buckets[band].get(key, ()))
+
+        best = None
+        for candidate in candidates:
+            score = self.estimate_similarity(signature, self.signatures[candidate])
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (candidate, score)
+        return best
+
+    def add(self, key: str, text: str) -> None:
+        with self.lock:
+            self.insert(key, self.signature(text))
+
+    def insert(self, key: str, signature: Tuple[int, ...]) -> None:
+        """Index a signature; the caller holds the lock"""
+        if key in self.signatures:
+            return
+        self.signatures[key] = signature
+        for band, band_key in enumerate(self.band_keys(signature)):
+            self.buckets[band].setdefault(band_key, set()).add(key)
+
+    def check_and_add(self, key: str, text: str) -> Optional[Tuple[str, float]]:
+        """
+        Return the near-duplicate of a text if there is one, otherwise index the text.
+        Check and insert happen under one lock so concurrent workers cannot both accept a pair.
+        """
+        signature = self.signature(text)
+        with self.lock:
+            self.checked += 1
+            match = self.find_similar(signature)
+            if match and match[0] != key:
+                self.near_duplicates += 1
+                return match
+            self.insert(key, signature)
+        return None
+
+    def stats(self) -> Dict[str, float]:
+        with self.lock:
+            return {
+                "indexed": len(self.signatures),
+                "checked": self.checked,
+                "near_duplicates": self.near_duplicates,
+                "rejection_rate": self.near_duplicates / self.checked if self.checked else 0.0
+            }
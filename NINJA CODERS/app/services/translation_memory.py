@@ -0,0 +1,231 @@
+import re
+import time
+import hashlib
+import logging
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from services.db import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+# Sentence boundaries and line breaks; the capture group keeps the separators so the text can be rebuilt exactly
+SEGMENT_BREAK = re.compile(r"(\s*\n\s*|(?<=[.!?])\s+|(?<=[。！？])\s*)")
+CLAUSE_BREAK = re.compile(r"((?<=[,;:，；：])\s*)")
+WORD_BREAK = re.compile(r"(\s+)")
+# Han, kana and Hangul: SentencePiece vocabularies spend at least one token on each of these
+CJK_CHAR = re.compile(
+    r"[\u1100-\u11ff\u3040-\u30ff\u3130-\u318f\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff\uff66-\uff9f]"
+)
+
+# opus-mt models accept 512 tokens per input; stay well under it with a conservative estimate
+MAX_SEGMENT_TOKENS = 400
+# Per upstream request: at most this many inputs and this many tokens in total
+BATCH_SIZE = 8
+BATCH_TOKENS = 1600
+
+def is_translatable(piece: str) -> bool:
+    return bool(piece.strip())
+
+def estimate_tokens(text: str) -> int:
+    """Rough SentencePiece token count: about three characters per token, but one per CJK character"""
+    cjk = len(CJK_CHAR.findall(text))
+    return cjk + (len(text) - cjk) // 3 + 1
+
+def split_long(piece: str, max_tokens: int) -> List[str]:
+    """Break an over-long sentence at clause boundaries, then at spaces, then anywhere.
+
+    The whitespace at each cut becomes a piece of its own, like the separators of split_segments,
+    so it is kept verbatim instead of being trimmed off by the model.
+    """
+    if estimate_tokens(piece) <= max_tokens:
+        return [piece]
+    for pattern in (CLAUSE_BREAK, WORD_BREAK):
+        parts = [part for part in pattern.split(piece) if part]
+        if len(parts) > 1:
+            break
+    else:
+        size = max(1, (max_tokens - 1) * len(piece) // estimate_tokens(piece))
+        parts = [piece[start:start + size] for start in range(0, len(piece), size)]
+
+    pieces = []
+    current = ""
+    separator = ""
+    for part in parts:
+        if not is_translatable(part):
+            separator += part
+            continue
+        if current and estimate_tokens(current + separator + part) <= max_tokens:
+            current += separator + part
+        else:
+            pieces.extend(done for done in (current, separator) if done)
+            current = part
+        separator = ""
+    pieces.extend(done for done in (current, separator) if done)
+    if len(pieces) == 1:
+        return pieces
+    return [
+        smaller for part in pieces
+        for smaller in (split_long(part, max_tokens) if is_translatable(part) else [part])
+    ]
+
+def split_segments(text: str, max_tokens: int = MAX_SEGMENT_TOKENS) -> List[str]:
+    """Split text into pieces that join back to the original: sentences alternating with separators.
+
+    Sentences longer than the model's input limit are broken up further, with the whitespace
+    between their parts as separators of its own, so joining still reproduces the text exactly.
+    """
+    pieces = []
+    for piece in SEGMENT_BREAK.split(text):
+        if piece:
+            pieces.extend(split_long(piece, max_tokens) if is_translatable(piece) else [piece])
+    return pieces
+
+def make_batches(segments: Sequence[str], batch_size: int = BATCH_SIZE,
+                 batch_tokens: int = BATCH_TOKENS) -> List[List[str]]:
+    """Group segments, in order, into upstream requests bounded by input count and total tokens"""
+    batches: List[List[str]] = []
+    tokens = 0
+    for segment in segments:
+        cost = estimate_tokens(segment)
+        if not batches or len(batches[-1]) >= batch_size or tokens + cost > batch_tokens:
+            batches.append([])
+            tokens = 0
+        batches[-1].append(segment)
+        tokens += cost
+    return batches
+
+class TranslationMemory(SQLiteStore):
+    """Persistent sentence-level translation cache keyed by (segment hash, source, target)"""
+
+    def __init__(self, db_path: str = "translation_memory.db", max_entries: int = 50000):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.setup_database()
+
+    def setup_database(self) -> None:
+        with self.connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS segments (
+                    key TEXT PRIMARY KEY,
+                    source_lang TEXT NOT NULL,
+                    target_lang TEXT NOT NULL,
+                    segment TEXT NOT NULL,
+                    translation TEXT NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_segments_access ON segments (last_access)")
+
+    @staticmethod
+    def normalize(segment: str) -> str:
+        """Unicode-normalize and collapse whitespace; case and punctuation matter to the translation"""
+        return " ".join(unicodedata.normalize("NFKC", segment).split())
+
+    def make_key(self, segment: str, source_lang: str, target_lang: str) -> str:
+        digest = hashlib.sha256(self.normalize(segment).encode("utf-8")).hexdigest()
+        return f"{source_lang}\x1f{target_lang}\x1f{digest}"
+
+    def get_many(self, segments: Sequence[str], source_lang: str, target_lang: str) -> Dict[str, str]:
+        """Translations already in memory for the given segments, keyed by normalized segment"""
+        keys = {self.make_key(segment, source_lang, target_lang): self.normalize(segment) for segment in segments}
+        if not keys:
+            return {}
+        found = {}
+        with self.lock, self.connect() as conn:
+            for start in range(0, len(keys), 500):
+                batch = list(keys)[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT key, translation FROM segments WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                found.update((keys[key], translation) for key, translation in rows)
+                conn.execute(
+                    f"UPDATE segments SET last_access = ? WHERE key IN ({placeholders})", [time.time(), *batch]
+                )
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, pairs: Sequence[Tuple[str, str]], source_lang: str, target_lang: str) -> None:
+        """Store (segment, translation) pairs and evict the least recently used entries above max_entries"""
+        now = time.time()
+        rows = [
+            (self.make_key(segment, source_lang, target_lang), source_lang, target_lang, segment, translation, now)
+            for segment, translation in pairs
+        ]
+        with self.lock, self.connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO segments (key, source_lang, target_lang, segment, translation, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            excess = conn.execute("SELECT COUNT(*) FROM segments").fetchone()[0] - self.max_entries
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM segments WHERE key IN (SELECT key FROM segments ORDER BY last_access LIMIT ?)",
+                    (excess,)
+                )
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters since the process started"""
+        with self.connect() as conn:
+            size = conn.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": size}
+
+def translate_segments(text: str, source_lang: str, target_lang: str, memory: TranslationMemory,
+                       translate_batch: Callable[[List[str]], List[str]], workers: int = 1,
+                       on_progress: Optional[Callable[[str, int, int], None]] = None) -> Tuple[str, int, int]:
+    """Translate only the sentences not already in memory and rebuild the text in order.
+
+    Missing segments go upstream in batches (see make_batches), up to `workers` at a time;
+    translate_batch must return one translation per segment, in order. After each batch,
+    on_progress(translated prefix, batches done, batch count) receives the longest fully
+    translated beginning of the text, so long documents can be shown as they arrive.
+    Returns (translated text, segments served from memory, segments sent upstream).
+    """
+    pieces = split_segments(text)
+    # Segments differing only in whitespace or Unicode form share one key and one translation
+    segments: Dict[str, str] = {}
+    for piece in pieces:
+        if is_translatable(piece):
+            segments.setdefault(memory.normalize(piece), piece)
+    translations = memory.get_many(list(segments.values()), source_lang, target_lang)
+    missing = [segment for key, segment in segments.items() if key not in translations]
+
+    def translated_prefix() -> str:
+        done = []
+        for piece in pieces:
+            if not is_translatable(piece):
+                done.append(piece)
+            elif memory.normalize(piece) in translations:
+                done.append(translations[memory.normalize(piece)])
+            else:
+                break
+        return "".join(done)
+
+    batches = make_batches(missing)
+    if batches:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(batches)))) as executor:
+            futures = {executor.submit(translate_batch, batch): batch for batch in batches}
+            for done_count, future in enumerate(as_completed(futures), start=1):
+                batch = futures[future]
+                fresh = future.result()
+                if len(fresh) != len(batch):
+                    raise ValueError(f"Expected {len(batch)} translations, got {len(fresh)}")
+                memory.put_many(list(zip(batch, fresh)), source_lang, target_lang)
+                translations.update(
+                    (memory.normalize(segment), translation) for segment, translation in zip(batch, fresh)
+                )
+                if on_progress:
+                    on_progress(translated_prefix(), done_count, len(batches))
+
+    logger.info(f"{source_lang}->{target_lang}: {len(segments) - len(missing)} segments from memory, "
+                f"{len(missing)} sent upstream in {len(batches)} requests")
+    output = "".join(translations[memory.normalize(piece)] if is_translatable(piece) else piece for piece in pieces)
+    return output, len(segments) - len(missing), len(missing)
@@ -0,0 +1,266 @@
+import os
+import re
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from io import BytesIO
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import streamlit as st
+from services.mp3 import duration, join_clips
+from services.tts_engines import EngineRouter, build_router
+
+logger = logging.getLogger(__name__)
+
+# gTTS sends one request per ~100 characters, one after another; chunks of this size run in parallel instead
+MAX_CHUNK_CHARS = 100
+CHUNK_WORKERS = 4
+
+SENTENCE_END = re.compile(r"(?<=[.!?;。！？；])\s+|(?<=[。！？；])")
+
+class AudioCache:
+    """Content-addressed MP3 cache with a memory tier and a size-bounded disk tier"""
+
+    def __init__(self, cache_dir: str = ".audio_cache", max_memory_bytes: int = 32 * 1024 * 1024,
+                 max_disk_bytes: int = 512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.lock = threading.Lock()
+        self.memory = OrderedDict()
+        self.memory_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.disk_bytes = sum(
+            entry.stat().st_size for entry in os.scandir(self.cache_dir) if entry.name.endswith(".mp3")
+        )
+
+    @staticmethod
+    def make_key(text: str, lang: str, slow: bool = False, engine: str = "gtts") -> str:
+        # gTTS clips keep the key format from before engines existed, so the warm cache stays valid
+        prefix = "" if engine == "gtts" else f"{engine}\x1f"
+        return hashlib.sha256(f"{prefix}{lang}\x1f{int(slow)}\x1f{text}".encode("utf-8")).hexdigest()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.mp3")
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Look a clip up in memory, then on disk (promoting it to memory)"""
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return self.memory[key]
+
+        path = self.path_for(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            # Refresh the modification time so disk eviction stays least-recently-used
+            os.utime(path)
+        except OSError:
+            with self.lock:
+                self.misses += 1
+            return None
+
+        with self.lock:
+            self.hits += 1
+            self.remember(key, data)
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store a clip in both tiers"""
+        with self.lock:
+            self.remember(key, data)
+
+        path = self.path_for(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            existed = os.path.exists(path)
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            if not existed:
+                with self.lock:
+                    self.disk_bytes += len(data)
+                    over_limit = self.disk_bytes > self.max_disk_bytes
+                if over_limit:
+                    self.evict_disk()
+        except OSError as e:
+            logger.warning(f"Could not write audio cache entry {key}: {str(e)}")
+
+    def remember(self, key: str, data: bytes) -> None:
+        """Add a clip to the memory tier; the caller holds the lock"""
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            return
+        self.memory[key] = data
+        self.memory_bytes += len(data)
+        while self.memory_bytes > self.max_memory_bytes and len(self.memory) > 1:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_bytes -= len(evicted)
+
+    def evict_disk(self) -> None:
+        """Delete the least recently used files until the disk tier is under 90% of its limit"""
+        entries = sorted(
+            (entry for entry in os.scandir(self.cache_dir) if entry.name.endswith(".mp3")),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        usage = sum(entry.stat().st_size for entry in entries)
+        target = int(self.max_disk_bytes * 0.9)
+        for entry in entries:
+            if usage <= target:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                usage -= size
+            except OSError:
+                continue
+        with self.lock:
+            self.disk_bytes = usage
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "memory_bytes": self.memory_bytes,
+            "disk_bytes": self.disk_bytes
+        }
+
+@st.cache_resource(show_spinner=False)
+def get_audio_cache() -> AudioCache:
+    """Process-wide audio cache shared by all pages"""
+    return AudioCache()
+
+@st.cache_resource(show_spinner=False)
+def get_tts_router() -> EngineRouter:
+    """Process-wide TTS engines, so the local process pool is shared by all sessions"""
+    return build_router()
+
+def synthesize(text: str, lang: str, slow: bool = False, timeout: Optional[float] = None) -> bytes:
+    """Return MP3 bytes for a text, synthesizing only on a cache miss.
+
+    Engines are tried in the language's route order; a clip any of them already made is reused
+    before anything is synthesized, and a failing engine falls through to the next one.
+    """
+    cache = get_audio_cache()
+    engines = get_tts_router().route(lang)
+    if not engines:
+        raise ValueError(f"No speech engine available for language '{lang}'")
+
+    for engine in engines:
+        data = cache.get(cache.make_key(text, lang, slow, engine.name))
+        if data is not None:
+            return data
+
+    last_error = None
+    for engine in engines:
+        try:
+            data = engine.synthesize(text, lang, slow, timeout)
+        except Exception as e:
+            logger.warning(f"{engine.name} could not synthesize {lang} audio: {str(e)}")
+            last_error = e
+            continue
+        cache.put(cache.make_key(text, lang, slow, engine.name), data)
+        return data
+    raise last_error
+
+def synthesize_many(texts: List[str], lang: str, workers: int = 8,
+                    timeout: Optional[float] = None) -> Tuple[Dict[str, bytes], List[str]]:
+    """Synthesize texts concurrently on a bounded thread pool.
+
+    Each clip gets `timeout` seconds once it starts, so the whole batch waits at most one timeout
+    per round of workers. Returns the clips and the texts that failed or missed the deadline.
+    """
+    texts = list(dict.fromkeys(texts))
+    if not texts:
+        return {}, []
+    executor = ThreadPoolExecutor(max_workers=min(workers, len(texts)))
+    futures = {executor.submit(synthesize, text, lang, False, timeout): text for text in texts}
+    rounds = -(-len(texts) // workers)
+    done, not_done = wait(futures, timeout=timeout * rounds if timeout else None)
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    clips = {}
+    failed = [futures[future] for future in not_done]
+    for future in done:
+        text = futures[future]
+        try:
+            clips[text] = future.result()
+        except Exception as e:
+            failed.append(text)
+            logger.warning(f"Audio generation error for '{text}': {str(e)}")
+    return clips, failed
+
+def text_to_speech(text: str, lang: str, slow: bool = False, timeout: Optional[float] = None) -> BytesIO:
+    """Cached synthesis returned as a file-like object, like the page helpers expect"""
+    return BytesIO(synthesize(text, lang, slow, timeout))
+
+def split_sentences(text: str, max_chars: int = MAX_CHUNK_CHARS) -> List[str]:
+    """Split text into chunks on sentence boundaries, packing short sentences and breaking long ones at spaces"""
+    pieces = []
+    for sentence in SENTENCE_END.split(text.strip()):
+        sentence = sentence.strip()
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars + 1)
+            if cut <= 0:
+                cut = max_chars
+            pieces.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if sentence:
+            pieces.append(sentence)
+
+    chunks = []
+    for piece in pieces:
+        # Never merge into the first chunk: it should be as quick as possible to synthesize
+        if len(chunks) > 1 and len(chunks[-1]) + 1 + len(piece) <= max_chars:
+            chunks[-1] = f"{chunks[-1]} {piece}"
+        else:
+            chunks.append(piece)
+    return chunks
+
+def synthesize_chunks(text: str, lang: str, slow: bool = False, timeout: Optional[float] = None,
+                      max_chars: int = MAX_CHUNK_CHARS, workers: int = CHUNK_WORKERS) -> Iterator[bytes]:
+    """Synthesize sentence chunks concurrently and yield their clips in order, each as soon as it is ready"""
+    chunks = split_sentences(text, max_chars)
+    if not chunks:
+        return
+    executor = ThreadPoolExecutor(max_workers=min(workers, len(chunks)))
+    try:
+        futures = [executor.submit(synthesize, chunk, lang, slow, timeout) for chunk in chunks]
+        for future in futures:
+            yield future.result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def speak_progressively(text: str, lang: str, play: Callable[[bytes, int], None],
+                        slow: bool = False, timeout: Optional[float] = None) -> Tuple[bytes, int, float, float]:
+    """Play the first chunk as soon as it is ready, then swap in the full clip.
+
+    play(clip, start_time) first receives the first chunk with start_time 0. When there are more
+    chunks, it is called again with the full clip and the whole second the first chunk has played
+    up to, so the page can replace the player in place and let playback carry on from there.
+    Returns (full clip, chunk count, seconds to first audio, seconds to full clip).
+    """
+    start = time.perf_counter()
+    first_audio = 0.0
+    clips = []
+    for clip in synthesize_chunks(text, lang, slow, timeout):
+        if not clips:
+            first_audio = time.perf_counter() - start
+            play(clip, 0)
+        clips.append(clip)
+    total = time.perf_counter() - start
+    logger.info(f"TTS {lang}: {len(text)} chars in {len(clips)} chunks, "
+                f"first audio after {first_audio:.2f}s, full clip after {total:.2f}s")
+    if len(clips) == 1:
+        return clips[0], 1, first_audio, total
+
+    full_clip = join_clips(clips)
+    played = min(time.perf_counter() - start - first_audio, duration(clips[0]))
+    play(full_clip, int(played))
+    return full_clip, len(clips), first_audio, total
@@ -0,0 +1,120 @@
+import os
+import shutil
+import logging
+import threading
+import subprocess
+from io import BytesIO
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Every clip is MP3 at gTTS's format (24 kHz mono, 32 kbps) so clips from different engines can be joined
+MP3_SAMPLE_RATE = 24000
+MP3_BITRATE = "32k"
+
+class TTSEngine:
+    """A speech synthesizer producing MP3 bytes; subclasses declare the languages they speak"""
+
+    name = "base"
+    languages: Dict[str, str] = {}
+
+    def is_available(self) -> bool:
+        return True
+
+    def supports(self, lang: str) -> bool:
+        return lang in self.languages
+
+    def synthesize(self, text: str, lang: str, slow: bool = False, timeout: Optional[float] = None) -> bytes:
+        raise NotImplementedError
+
+class GTTSEngine(TTSEngine):
+    """Google Translate's TTS endpoint: good voices, but one network round trip per ~100 characters"""
+
+    name = "gtts"
+    languages = {code: code for code in (
+        "en", "fr", "es", "de", "it", "ja", "ko", "pt", "nl", "zh-CN", "ru", "ar", "hi", "tr", "pl", "sv"
+    )}
+    languages["zh"] = "zh-CN"
+
+    def __init__(self, connect_timeout: float = 3.05, read_timeout: float = 10.0):
+        # Used when the caller sets no timeout, so a stalled request cannot hang the script thread
+        self.timeout = (connect_timeout, read_timeout)
+
+    def synthesize(self, text: str, lang: str, slow: bool = False, timeout: Optional[float] = None) -> bytes:
+        from gtts import gTTS
+
+        buf = BytesIO()
+        gTTS(text=text, lang=self.languages[lang], slow=slow, timeout=timeout or self.timeout).write_to_fp(buf)
+        return buf.getvalue()
+
+class EspeakEngine(TTSEngine):
+    """Local espeak-ng voices encoded to MP3 by ffmpeg; works offline, at most max_processes at a time"""
+
+    name = "espeak"
+    languages = {
+        "en": "en", "fr": "fr", "es": "es", "de": "de", "it": "it", "pt": "pt", "nl": "nl", "ru": "ru",
+        "ar": "ar", "hi": "hi", "tr": "tr", "pl": "pl", "sv": "sv", "ja": "ja", "ko": "ko",
+        "zh": "cmn", "zh-CN": "cmn"
+    }
+
+    def __init__(self, max_processes: int = 4, timeout: float = 20.0):
+        # Used when the caller sets no timeout, so a stuck process cannot hold a slot forever
+        self.timeout = timeout
+        self.espeak = shutil.which("espeak-ng") or shutil.which("espeak")
+        self.ffmpeg = shutil.which("ffmpeg")
+        self.slots = threading.BoundedSemaphore(max_processes)
+
+    def is_available(self) -> bool:
+        return bool(self.espeak and self.ffmpeg)
+
+    def synthesize(self, text: str, lang: str, slow: bool = False, timeout: Optional[float] = None) -> bytes:
+        speed = "120" if slow else "165"
+        timeout = timeout or self.timeout
+        with self.slots:
+            wav = subprocess.run(
+                [self.espeak, "-v", self.languages[lang], "-s", speed, "--stdout", "--stdin"],
+                input=text.encode("utf-8"), capture_output=True, timeout=timeout, check=True
+            ).stdout
+            mp3 = subprocess.run(
+                [self.ffmpeg, "-loglevel", "error", "-f", "wav", "-i", "pipe:0", "-ac", "1",
+                 "-ar", str(MP3_SAMPLE_RATE), "-b:a", MP3_BITRATE, "-f", "mp3", "pipe:1"],
+                input=wav, capture_output=True, timeout=timeout, check=True
+            ).stdout
+        if not mp3:
+            raise RuntimeError(f"espeak produced no audio for language '{lang}'")
+        return mp3
+
+# Engines to try, first choice first. Both engines cover every language code used by the pages
+# (text2speech, translator, dictionary). gTTS leads because its voices are far better for learners;
+# TTS_PREFERRED_ENGINE=espeak moves local synthesis to the front of every route that is not pinned.
+DEFAULT_ROUTE = ("gtts", "espeak")
+PINNED_ROUTES: Dict[str, Tuple[str, ...]] = {
+    # espeak's CJK voices are barely intelligible: only use them when Google is unreachable
+    "ja": ("gtts", "espeak"),
+    "ko": ("gtts", "espeak"),
+    "zh": ("gtts", "espeak"),
+    "zh-CN": ("gtts", "espeak")
+}
+
+class EngineRouter:
+    """Pick the engines to try for a language, in order, skipping ones that are missing or mute"""
+
+    def __init__(self, engines: List[TTSEngine], preferred: Optional[str] = None):
+        self.engines = {engine.name: engine for engine in engines}
+        self.preferred = preferred
+
+    def route(self, lang: str) -> List[TTSEngine]:
+        names = list(PINNED_ROUTES.get(lang, DEFAULT_ROUTE))
+        if self.preferred in names and lang not in PINNED_ROUTES:
+            names.remove(self.preferred)
+            names.insert(0, self.preferred)
+        engines = [self.engines.get(name) for name in names]
+        return [engine for engine in engines if engine and engine.supports(lang) and engine.is_available()]
+
+def build_router() -> EngineRouter:
+    """Engines configured from the environment (TTS_PREFERRED_ENGINE, TTS_LOCAL_PROCESSES)"""
+    engines = [GTTSEngine(), EspeakEngine(int(os.getenv("TTS_LOCAL_PROCESSES", "4")))]
+    router = EngineRouter(engines, os.getenv("TTS_PREFERRED_ENGINE"))
+    available = [engine.name for engine in engines if engine.is_available()]
+    logger.info(f"TTS engines available: {', '.join(available)}")
+    return router
@@ -0,0 +1,55 @@
+import threading
+from services import tts
+from services.audio_pack import CLAUSE_GAP_MS, WORD_GAP_MS, AudioPack, build_pack, compose_sentence, sentence_tokens
+from services.mp3 import silence
+from benchmarks.fake_server import FAKE_MP3_FRAME
+
+def word_frame(number):
+    """A fake frame whose main data identifies the word it stands for"""
+    return FAKE_MP3_FRAME[:4] + bytes([number + 1]) * (len(FAKE_MP3_FRAME) - 4)
+
+def test_packed_clips_read_back_byte_identical(tmp_path, monkeypatch):
+    clips = {
+        "The happy cat runs quickly.": word_frame(1) * 3,
+        "Soon, the dog will read a book.": word_frame(2) * 5,
+        "In the park, my friend plays the guitar.": word_frame(3) * 4
+    }
+
+    def synthesize(sentence, lang):
+        if sentence not in clips:
+            raise RuntimeError("Failed to connect")
+        return clips[sentence]
+
+    monkeypatch.setattr(tts, "synthesize", synthesize)
+    path = str(tmp_path / "quiz.pack")
+
+    packed = build_pack(path, list(clips) + ["The sad bird sings loudly."], workers=2)
+    pack = AudioPack(path)
+
+    assert packed == len(pack) == 3
+    assert all(pack.get(sentence) == clip for sentence, clip in clips.items())
+    assert "The sad bird sings loudly." not in pack
+    assert pack.get("The sad bird sings loudly.") is None
+
+def test_sentence_is_composed_from_word_clips():
+    sentence = "In the park, the dog plays the ball."
+    vocabulary = {word: number for number, word in enumerate(dict.fromkeys(w for w, _ in sentence_tokens(sentence)))}
+    lock = threading.Lock()
+    calls = []
+
+    def synthesize(word, lang):
+        with lock:
+            calls.append(word)
+        return word_frame(vocabulary[word]) * 2
+
+    clip = compose_sentence(sentence, synthesize_fn=synthesize)
+
+    tokens = sentence_tokens(sentence)
+    expected = b"".join(
+        word_frame(vocabulary[word]) * 2 + (silence(FAKE_MP3_FRAME, gap) if i < len(tokens) - 1 else b"")
+        for i, (word, gap) in enumerate(tokens)
+    )
+    assert sorted(calls) == sorted(vocabulary)
+    assert clip == expected
+    # A longer pause after the comma than between the other words
+    assert dict(tokens)["park"] == CLAUSE_GAP_MS and dict(tokens)["dog"] == WORD_GAP_MS
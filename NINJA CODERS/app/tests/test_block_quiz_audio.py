@@ -0,0 +1,58 @@
+import os
+import threading
+import pytest
+from streamlit.testing.v1 import AppTest
+from services import tts
+from services.tts_engines import EngineRouter, TTSEngine
+from benchmarks.fake_server import FAKE_MP3_FRAME
+
+BLOCK_QUIZ = os.path.join(os.path.dirname(__file__), os.pardir, "pages", "features", "block_quiz.py")
+
+class CountingEngine(TTSEngine):
+    """Stands in for gTTS and counts how often the network would have been hit"""
+
+    name = "gtts"
+    languages = {"en": "en"}
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = []
+
+    def synthesize(self, text, lang, slow=False, timeout=None):
+        with self.lock:
+            self.calls.append(text)
+        return FAKE_MP3_FRAME * 10
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    # Run without an audio pack, against an empty shared cache
+    monkeypatch.chdir(tmp_path)
+    engine = CountingEngine()
+    cache = tts.AudioCache(str(tmp_path / "audio_cache"))
+    router = EngineRouter([engine])
+    monkeypatch.setattr(tts, "get_audio_cache", lambda: cache)
+    monkeypatch.setattr(tts, "get_tts_router", lambda: router)
+    return engine
+
+def solve_puzzle(sentence):
+    at = AppTest.from_file(BLOCK_QUIZ, default_timeout=10)
+    at.session_state["original_sentence"] = sentence
+    at.run()
+    for word in at.session_state["correct_words"]:
+        at.button(key=word).click().run()
+        assert not at.exception
+    assert at.success[0].value.startswith("🎉 Correct!")
+    return at
+
+def test_full_puzzle_synthesizes_the_sentence_once(engine):
+    at = solve_puzzle("The happy cat runs quickly.")
+
+    # One initial run plus one rerun per word click, but a single synthesis
+    assert len(at.session_state["correct_words"]) == 5
+    assert engine.calls == ["The happy cat runs quickly."]
+
+def test_second_session_reuses_the_shared_cache(engine):
+    solve_puzzle("The happy cat runs quickly.")
+    solve_puzzle("The happy cat runs quickly.")
+
+    assert len(engine.calls) == 1
@@ -0,0 +1,83 @@
+import random
+from services.chat_memory import TokenBudgetMemory
+from services.translation_memory import estimate_tokens
+
+def run_conversation(memory, turns, seed=0, max_words=(90, 225), word="word "):
+    """Drive the memory the way the chat page does and record prompt sizes and summarizer calls"""
+    rng = random.Random(seed)
+    history = []
+    sizes = []
+    calls = []
+
+    def summarize(summary, messages):
+        calls.append(messages)
+        # Worst case for the bound: a summarizer that never condenses anything
+        return f"{summary}\n{messages}"
+
+    for turn in range(turns):
+        question = f"question {turn} " + word * rng.randint(1, max_words[0])
+        prompt_history = memory.format_history(history)
+        sizes.append(estimate_tokens(prompt_history))
+        history.append(("You", question))
+        history.append(("Bot", f"answer {turn} " + word * rng.randint(1, max_words[1])))
+        memory.fold(history, summarize)
+    return history, sizes, calls
+
+def test_prompt_size_stays_bounded_over_200_turns():
+    memory = TokenBudgetMemory(max_tokens=1500)
+    history, sizes, calls = run_conversation(memory, 200)
+    assert max(sizes) <= memory.max_tokens
+    # Bounded because old turns were folded away, not because the history happened to be short
+    assert calls and memory.summarized_count > len(history) // 2
+    # And it stops growing once folding starts: the second hundred turns are no bigger than the first
+    assert max(sizes[100:]) <= max(sizes[:100])
+
+def test_japanese_conversation_stays_within_the_budget():
+    # Kana and kanji cost a token per character, four times what a Latin-script estimate would say
+    memory = TokenBudgetMemory(max_tokens=1500)
+    _, sizes, _ = run_conversation(memory, 200, max_words=(30, 80), word="日本語です")
+    assert max(sizes) <= memory.max_tokens
+
+def test_summarizer_runs_in_blocks_not_every_turn():
+    # Short messages: the message count overflows first, and each fold frees four turns
+    memory = TokenBudgetMemory(max_tokens=1500, recent_messages=12, summarize_batch=8)
+    _, _, calls = run_conversation(memory, 200, max_words=(10, 20))
+    assert 0 < len(calls) <= 200 // 4
+    assert all(messages.count("\n") + 1 >= 8 for messages in calls)
+
+def test_long_messages_still_summarize_well_under_once_per_turn():
+    # Long messages: the token budget overflows first, and each fold frees half of it
+    memory = TokenBudgetMemory(max_tokens=1500)
+    _, _, calls = run_conversation(memory, 200)
+    assert 0 < len(calls) <= 200 // 3
+
+def test_short_conversation_is_never_summarized():
+    memory = TokenBudgetMemory(max_tokens=1500)
+    calls = []
+    history = [("You", "hi"), ("Bot", "hello"), ("You", "how do I say cat in French?")]
+    rendered = memory.format_history(history)
+    assert not memory.fold(history, lambda summary, messages: calls.append(messages) or "")
+    assert calls == []
+    assert rendered == "You: hi\nBot: hello\nYou: how do I say cat in French?"
+
+def test_oversized_latest_message_is_truncated():
+    memory = TokenBudgetMemory(max_tokens=500, summary_tokens=100)
+    history = [("You", "x" * 10000)]
+    rendered = memory.format_history(history)
+    assert rendered.startswith("You: xxx")
+    assert memory.count_tokens(rendered) <= memory.max_tokens
+
+def test_rendering_never_calls_the_model():
+    # An unfolded backlog is left out of the prompt until the fold after the reply
+    memory = TokenBudgetMemory(max_tokens=1500, recent_messages=12)
+    history = [("You" if i % 2 == 0 else "Bot", f"message {i}") for i in range(40)]
+    rendered = memory.format_history(history)
+    assert rendered.splitlines() == [f"{role}: {msg}" for role, msg in history[-12:]]
+
+def test_replaced_chat_resets_the_summary():
+    memory = TokenBudgetMemory(max_tokens=1500)
+    history, _, _ = run_conversation(memory, 50)
+    assert memory.summary
+    memory.format_history(history[:2])
+    assert memory.summarized_count == 0
+    assert memory.summary == ""
@@ -0,0 +1,66 @@
+import json
+import sqlite3
+import threading
+import pytest
+from services.chat_store import ChatStore
+
+def write_legacy_file(path):
+    data = {
+        "chats": {
+            "20240101_120000": {"name": "Chat 1", "messages": [["You", "hola"], ["Bot", "¡Hola!"]]},
+            "20240102_120000": {"name": "Chat 2", "messages": [["You", "bonjour"]]}
+        },
+        "current_chat_id": "20240102_120000"
+    }
+    path.write_text(json.dumps(data))
+
+def test_import_json_migrates_once(tmp_path):
+    legacy = tmp_path / "chat_history.json"
+    write_legacy_file(legacy)
+    store = ChatStore(str(tmp_path / "chat.db"))
+
+    assert store.import_json(str(legacy))
+    assert store.list_chats() == {"20240101_120000": "Chat 1", "20240102_120000": "Chat 2"}
+    assert store.load_messages("20240101_120000") == [("You", "hola"), ("Bot", "¡Hola!")]
+    assert store.get_setting("current_chat_id") == "20240102_120000"
+    assert not legacy.exists()
+
+    write_legacy_file(legacy)
+    assert not store.import_json(str(legacy))
+    assert store.count_messages("20240101_120000") == 2
+
+def test_concurrent_imports_do_not_duplicate_messages(tmp_path):
+    legacy = tmp_path / "chat_history.json"
+    write_legacy_file(legacy)
+    db_path = str(tmp_path / "chat.db")
+    # Separate instances behave like separate processes: only SQLite's write lock is shared
+    stores = [ChatStore(db_path) for _ in range(8)]
+    barrier = threading.Barrier(len(stores))
+    results = []
+    errors = []
+
+    def run(store):
+        barrier.wait()
+        try:
+            results.append(store.import_json(str(legacy)))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(store,)) for store in stores]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert results.count(True) == 1
+    assert stores[0].count_messages("20240101_120000") == 2
+
+def test_create_chat_never_merges_into_an_existing_chat(tmp_path):
+    store = ChatStore(str(tmp_path / "chat.db"))
+    store.create_chat("chat-a", "Chat 1")
+    store.append_message("chat-a", "You", "hola")
+
+    with pytest.raises(sqlite3.IntegrityError):
+        store.create_chat("chat-a", "Chat 1")
+    assert store.list_chats() == {"chat-a": "Chat 1"}
@@ -0,0 +1,32 @@
+from services.mp3 import is_info_frame, iter_frames, join_clips
+from benchmarks.fake_server import FAKE_MP3_FRAME
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz, stereo, no CRC: 417-byte frames
+STEREO_HEADER = bytes([0xFF, 0xFB, 0x90, 0x00])
+
+def with_tag(header, length, side_info, tag):
+    frame = bytearray(header + bytes(length - 4))
+    frame[4 + side_info:4 + side_info + 4] = tag
+    return bytes(frame)
+
+def audio_frame(header, length, fill):
+    return header + bytes([fill]) * (length - 4)
+
+def test_detects_xing_and_info_frames():
+    assert is_info_frame(with_tag(FAKE_MP3_FRAME[:4], 96, 9, b"Xing"))
+    assert is_info_frame(with_tag(STEREO_HEADER, 417, 32, b"Info"))
+    assert not is_info_frame(with_tag(STEREO_HEADER, 417, 17, b"Info"))
+    assert not is_info_frame(FAKE_MP3_FRAME)
+
+def test_join_drops_info_frames_from_every_clip():
+    header = FAKE_MP3_FRAME[:4]
+    clips = [
+        with_tag(header, 96, 9, b"Xing") + audio_frame(header, 96, clip + 1) * 3
+        for clip in range(2)
+    ]
+
+    frames = list(iter_frames(join_clips(clips, [100, 0])))
+
+    assert not any(is_info_frame(frame) for frame in frames)
+    assert frames[:3] == [audio_frame(header, 96, 1)] * 3
+    assert frames[-3:] == [audio_frame(header, 96, 2)] * 3
@@ -0,0 +1,59 @@
+import threading
+from types import SimpleNamespace
+import pytest
+from services import quiz_generator
+from services.llm import MODEL_LADDER
+
+class GarbageModel:
+    """Answers every prompt with text that never parses, counting calls per model"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def for_model(self, api_key, model_name):
+        outer = self
+
+        class Model:
+            def generate_content(self, prompt):
+                with outer.lock:
+                    outer.calls[model_name] = outer.calls.get(model_name, 0) + 1
+                return SimpleNamespace(text="Sorry, I cannot help with that.")
+
+        return Model()
+
+@pytest.fixture
+def model(monkeypatch):
+    model = GarbageModel()
+    monkeypatch.setenv("GOOGLE_API_KEY", "test")
+    monkeypatch.setattr(quiz_generator, "get_generative_model", model.for_model)
+    return model
+
+def test_unparseable_question_is_retried_once_on_the_fallback_model(model):
+    quiz = quiz_generator.GeminiQuiz()
+
+    with pytest.raises(ValueError):
+        quiz.generate_question("English", "French", "Vocabulary", "beginner", set())
+
+    assert model.calls == {name: 1 for name in MODEL_LADDER}
+
+def test_unparseable_batch_falls_back_without_retrying(model):
+    quiz = quiz_generator.GeminiQuiz()
+
+    questions, missing = quiz.generate_questions_batch(
+        "English", "French", "Vocabulary", ["beginner", "advanced"], set()
+    )
+
+    assert (questions, missing) == ([], ["beginner", "advanced"])
+    assert model.calls == {name: 1 for name in MODEL_LADDER}
+
+def test_failed_questions_are_skipped_by_the_pool(model):
+    quiz = quiz_generator.GeminiQuiz()
+    questions = []
+
+    quiz.generate_concurrently(
+        "English", "French", "Vocabulary", ["beginner", "advanced"], set(), questions.append, max_workers=2
+    )
+
+    assert questions == []
+    assert model.calls == {name: 2 for name in MODEL_LADDER}
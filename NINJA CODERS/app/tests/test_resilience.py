@@ -0,0 +1,114 @@
+import time
+import threading
+import pytest
+import requests
+from benchmarks.fake_server import FakeServer
+from services.llm import ModelRouter
+from services.resilience import (
+    UPSTREAM_WORKERS, CircuitBreaker, CircuitOpenError, UpstreamBusyError, call_with_retry
+)
+
+def faulty_server(faults):
+    """A fake upstream answering with the given faults in order, then with a valid answer"""
+    faults = list(faults)
+
+    def handler(path, body):
+        fault = faults.pop(0) if faults else None
+        if fault in (429, 500, 401):
+            return fault, {"error": str(fault)}, 0
+        if fault == "parse":
+            return 200, b"not json", 0
+        if fault == "hang":
+            return 200, {"answer": "late"}, 2.0
+        return 200, {"answer": "ok"}, 0
+
+    return FakeServer(handler)
+
+def request_answer(url):
+    response = requests.post(f"{url}/generate", json={"prompt": "hi"}, timeout=5)
+    response.raise_for_status()
+    return response.json()["answer"]
+
+def test_rate_limits_and_server_errors_are_retried():
+    breaker = CircuitBreaker("test")
+    with faulty_server([429, 500]) as server:
+        answer = call_with_retry(lambda: request_answer(server.url), breaker=breaker, base_delay=0.01)
+    assert answer == "ok"
+    assert server.requests == 3
+    assert breaker.state == "closed" and breaker.failures == 0
+
+def test_parse_failures_do_not_count_against_the_upstream():
+    breaker = CircuitBreaker("test", failure_threshold=1)
+    with faulty_server(["parse", "parse"]) as server:
+        start = time.monotonic()
+        answer = call_with_retry(lambda: request_answer(server.url), breaker=breaker, base_delay=1.0)
+        assert time.monotonic() - start < 0.5
+    assert answer == "ok"
+    assert breaker.state == "closed"
+
+def test_auth_errors_are_raised_without_retry_or_breaker_change():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.1)
+    with faulty_server([401]) as server:
+        with pytest.raises(requests.HTTPError):
+            call_with_retry(lambda: request_answer(server.url), breaker=breaker, base_delay=0.01)
+        assert server.requests == 1
+        # The half-open trial slot is freed, but the breaker is not closed by an unusable answer
+        assert breaker.state == "half-open"
+        assert call_with_retry(lambda: request_answer(server.url), breaker=breaker) == "ok"
+    assert breaker.state == "closed"
+
+def test_breaker_opens_and_fails_fast():
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=60)
+    with faulty_server([500] * 10) as server:
+        with pytest.raises(requests.HTTPError):
+            call_with_retry(lambda: request_answer(server.url), breaker=breaker, max_attempts=3,
+                            base_delay=0.01)
+        with pytest.raises(CircuitOpenError):
+            call_with_retry(lambda: request_answer(server.url), breaker=breaker, base_delay=0.01)
+    assert server.requests == 3
+    assert breaker.state == "open"
+
+def test_deadline_bounds_a_hung_call():
+    breaker = CircuitBreaker("test")
+    with faulty_server(["hang"]) as server:
+        start = time.monotonic()
+        with pytest.raises(TimeoutError):
+            call_with_retry(lambda: request_answer(server.url), breaker=breaker, deadline=0.3)
+        assert time.monotonic() - start < 1.0
+    assert breaker.failures == 1
+
+def test_queueing_for_a_worker_does_not_count_against_the_upstream():
+    breaker = CircuitBreaker("test", failure_threshold=3)
+    outcomes = []
+    lock = threading.Lock()
+
+    # Three waves of callers on a healthy 0.4 s upstream: the first two fit in the 0.6 s deadline
+    # once they get a worker, the third never gets one in time
+    def caller():
+        try:
+            call_with_retry(lambda: time.sleep(0.4) or "ok", breaker=breaker, max_attempts=1, deadline=0.6)
+            outcome = "ok"
+        except Exception as e:
+            outcome = type(e).__name__
+        with lock:
+            outcomes.append(outcome)
+
+    threads = [threading.Thread(target=caller) for _ in range(UPSTREAM_WORKERS * 3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Earlier tests may still hold a worker or two with abandoned calls
+    assert outcomes.count("ok") > UPSTREAM_WORKERS * 3 // 2
+    assert set(outcomes) <= {"ok", UpstreamBusyError.__name__}
+    assert breaker.state == "closed" and breaker.failures == 0
+
+def test_router_times_out_on_the_last_model():
+    router = ModelRouter("test", ["only-model"], timeout=0.3)
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        router.call(lambda model_name: time.sleep(2.0))
+    assert time.monotonic() - start < 1.0
@@ -0,0 +1,18 @@
+from services.similarity import NearDuplicateIndex
+
+def test_rephrased_question_is_flagged():
+    index = NearDuplicateIndex()
+    index.add("apple", "What is the French word for the red apple on the kitchen table?")
+
+    match = index.check_and_add("apple-again", "What is the French word for the red apple on the table?")
+
+    assert match is not None and match[0] == "apple"
+    assert "apple-again" not in index.signatures
+
+def test_different_question_is_indexed():
+    index = NearDuplicateIndex()
+    index.add("apple", "What is the French word for the red apple on the kitchen table?")
+
+    assert index.check_and_add("morning", "How do you say good morning to your teacher in Spanish?") is None
+    assert "morning" in index.signatures
+    assert index.stats()["near_duplicates"] == 0
@@ -0,0 +1,63 @@
+from services.translation_memory import (
+    MAX_SEGMENT_TOKENS, TranslationMemory, estimate_tokens, is_translatable, split_segments, translate_segments
+)
+
+class FakeTranslator:
+    """Upper-cases every segment and records what went upstream"""
+
+    def __init__(self):
+        self.sent = []
+
+    def __call__(self, batch):
+        self.sent.extend(batch)
+        return [segment.upper() for segment in batch]
+
+def test_whitespace_variants_share_one_translation(tmp_path):
+    memory = TranslationMemory(str(tmp_path / "tm.db"))
+    translator = FakeTranslator()
+
+    output, reused, sent = translate_segments("Hi  there. Hi there. Bye.", "en", "fr", memory, translator)
+
+    assert translator.sent == ["Hi  there.", "Bye."]
+    assert (reused, sent) == (0, 2)
+    assert output == "HI  THERE. HI  THERE. BYE."
+
+def test_memory_serves_normalized_matches(tmp_path):
+    memory = TranslationMemory(str(tmp_path / "tm.db"))
+    translate_segments("Hi there. Bye.", "en", "fr", memory, FakeTranslator())
+    translator = FakeTranslator()
+
+    output, reused, sent = translate_segments("Hi  there.\nBye.", "en", "fr", memory, translator)
+
+    assert translator.sent == []
+    assert (reused, sent) == (2, 0)
+    assert output == "HI THERE.\nBYE."
+
+def strip_translator(batch):
+    # Like the real model: the output never keeps leading or trailing whitespace
+    return [segment.strip().upper() for segment in batch]
+
+def test_long_sentence_keeps_the_spaces_between_its_parts(tmp_path):
+    memory = TranslationMemory(str(tmp_path / "tm.db"))
+    text = " ".join(f"word{i}" for i in range(600)) + ", and " + " ".join(f"more{i}" for i in range(300)) + "."
+
+    output, _, sent = translate_segments(text, "en", "fr", memory, strip_translator)
+
+    assert sent > 1
+    assert output == text.upper()
+
+def test_split_segments_reproduces_the_text():
+    text = "First,  second;\tthird " * 200 + "end.\n" + "x" * 2000
+    pieces = split_segments(text)
+
+    assert "".join(pieces) == text
+    assert all(estimate_tokens(piece) <= MAX_SEGMENT_TOKENS for piece in pieces)
+    assert not any(piece != piece.strip() for piece in pieces if is_translatable(piece))
+
+def test_cjk_segments_are_counted_per_character():
+    text = "这是一个很长的句子" * 133
+
+    assert estimate_tokens(text) > len(text)
+    pieces = split_segments(text + "。")
+    assert "".join(pieces) == text + "。"
+    assert all(len(piece) <= MAX_SEGMENT_TOKENS for piece in pieces)
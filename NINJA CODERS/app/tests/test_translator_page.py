@@ -0,0 +1,41 @@
+import os
+import json
+import pytest
+import requests
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+from services import http_client
+
+TRANSLATOR = os.path.join(os.path.dirname(__file__), os.pardir, "pages", "features", "languito_translator.py")
+
+class FakeClient:
+    """Answers every translation request with the same 200 body"""
+
+    def __init__(self, body):
+        self.body = body
+
+    def post(self, url, json=None, headers=None):
+        response = requests.Response()
+        response.status_code = 200
+        response._content = self.body
+        return response
+
+@pytest.mark.parametrize("body", [
+    {"error": "Model opus-mt-en-fr is currently loading"},
+    [{"unexpected": "shape"}],
+    []
+])
+def test_unexpected_answers_are_shown_as_errors(tmp_path, monkeypatch, body):
+    monkeypatch.chdir(tmp_path)
+    # The translation memory is cached per process with a path relative to the working directory
+    st.cache_resource.clear()
+    monkeypatch.setenv("HUGGINGFACE_API_TOKEN", "test")
+    monkeypatch.setattr(http_client, "get_http_client", lambda: FakeClient(json.dumps(body).encode()))
+
+    at = AppTest.from_file(TRANSLATOR, default_timeout=10)
+    at.run()
+    at.text_area(key="input").input("Hello there.")
+    next(button for button in at.button if button.label == "🔄 Translate").click().run()
+
+    assert not at.exception
+    assert any("unexpected answer" in error.value for error in at.error)
@@ -0,0 +1,64 @@
+import pytest
+from services import tts
+from services.mp3 import iter_frames
+from services.tts_engines import EngineRouter, TTSEngine
+from benchmarks.fake_server import FAKE_MP3_FRAME
+
+class FakeEngine(TTSEngine):
+    """Instant stand-in engine: one frame per character, so clip lengths are easy to check"""
+
+    languages = {"en": "en"}
+
+    def __init__(self, name="gtts", error=None):
+        self.name = name
+        self.error = error
+        self.calls = []
+
+    def synthesize(self, text, lang, slow=False, timeout=None):
+        self.calls.append(text)
+        if self.error:
+            raise self.error
+        return FAKE_MP3_FRAME * len(text)
+
+@pytest.fixture
+def use_engines(tmp_path, monkeypatch):
+    def install(*engines):
+        cache = tts.AudioCache(str(tmp_path / "audio_cache"))
+        router = EngineRouter(list(engines))
+        monkeypatch.setattr(tts, "get_audio_cache", lambda: cache)
+        monkeypatch.setattr(tts, "get_tts_router", lambda: router)
+        return cache
+    return install
+
+def test_full_clip_replaces_the_first_chunk(use_engines):
+    use_engines(FakeEngine())
+    text = "First sentence here. " + "Then a much longer second sentence that runs on for a while. " * 3
+    plays = []
+
+    full_clip, chunks, _, _ = tts.speak_progressively(text, "en", lambda clip, start: plays.append((clip, start)))
+
+    assert chunks > 1
+    assert [start for _, start in plays] == [0, 0]
+    assert plays[0][0] == FAKE_MP3_FRAME * len("First sentence here.")
+    assert plays[1][0] == full_clip
+    assert len(list(iter_frames(full_clip))) == sum(len(chunk) for chunk in tts.split_sentences(text))
+
+def test_short_text_is_played_once(use_engines):
+    use_engines(FakeEngine())
+    plays = []
+
+    tts.speak_progressively("Hello there.", "en", lambda clip, start: plays.append(start))
+
+    assert plays == [0]
+
+def test_failing_engine_falls_back_to_the_next_one(use_engines):
+    gtts = FakeEngine("gtts", error=RuntimeError("Failed to connect"))
+    espeak = FakeEngine("espeak")
+    cache = use_engines(gtts, espeak)
+
+    clip = tts.synthesize("Hello there.", "en")
+
+    assert clip == FAKE_MP3_FRAME * len("Hello there.")
+    assert cache.get(cache.make_key("Hello there.", "en", engine="espeak")) == clip
+    assert tts.synthesize("Hello there.", "en") == clip
+    assert (len(gtts.calls), len(espeak.calls)) == (1, 1)